@@ -1,47 +1,285 @@
-import pyautogui
-import pyperclip
 import time
 import random
 import threading
 import sys
+import os
+import importlib.util
 import re
+import stat
+import struct
+import hashlib
+import csv
+import json
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from itertools import accumulate, count
 
-# Try to import numpy, fall back to basic random if not available
-try:
-    import numpy as np
-    HAS_NUMPY = True
-except ImportError:
-    HAS_NUMPY = False
-    print("[WARNING] 📦 NumPy not found. Using basic random distribution.")
-    print("[INFO] 💻 For better typing realism, install with: pip3 install numpy")
+def _lazy_import(name):
+    """Module executed only on first attribute access, or None if not installed"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# Heavy dependencies load on first use, so importing or starting the tool stays fast.
+# Without NumPy the planner and telemetry fall back to pure Python.
+np = _lazy_import('numpy')
+HAS_NUMPY = np is not None
+pyperclip = _lazy_import('pyperclip')
+asyncio = _lazy_import('asyncio')
 
 # Typing states
 TYPING_STOPPED = 0
 TYPING_ACTIVE = 1
 TYPING_PAUSED = 2
 
-typing_state = TYPING_STOPPED
-typing_thread = None
-typing_position = 0
-typing_lock = threading.Lock()
+class SessionController:
+    """Typing state shared by the hotkey callbacks and the typing worker"""
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._state = TYPING_STOPPED
+        self.position = 0        # Next character index to type
+        self.last_emitted = -1   # Index of the last character actually sent
+        self.telemetry = None    # KeystrokeTelemetry of the current or last run
+    
+    @property
+    def state(self):
+        return self._state
+    
+    def _set_state(self, state, allowed):
+        with self._condition:
+            if self._state not in allowed:
+                return False
+            self._state = state
+            self._condition.notify_all()
+            return True
+    
+    def start(self):
+        """Mark a new typing run as active"""
+        return self._set_state(TYPING_ACTIVE, (TYPING_STOPPED,))
+    
+    def pause(self):
+        return self._set_state(TYPING_PAUSED, (TYPING_ACTIVE,))
+    
+    def resume(self):
+        return self._set_state(TYPING_ACTIVE, (TYPING_PAUSED,))
+    
+    def stop(self):
+        return self._set_state(TYPING_STOPPED, (TYPING_ACTIVE, TYPING_PAUSED))
+    
+    def sleep(self, timeout):
+        """Sleep up to timeout, waking at once if the run is paused or stopped"""
+        with self._condition:
+            if self._state == TYPING_ACTIVE:
+                self._condition.wait_for(lambda: self._state != TYPING_ACTIVE, timeout)
+            return self._state == TYPING_ACTIVE
+    
+    def wait_while_paused(self):
+        """Block without using CPU while paused; False once the run is stopped"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._state != TYPING_PAUSED)
+            return self._state == TYPING_ACTIVE
+    
+    def mark_emitted(self, index):
+        """Record that the character at index has been sent"""
+        with self._condition:
+            self.last_emitted = index
+            self.position = index + 1
+    
+    def reset_position(self):
+        with self._condition:
+            self.position = 0
+            self.last_emitted = -1
+
+# Default controller for direct human_type_enhanced() calls; queued jobs have their own
+session = SessionController()
 
 # WPM Configuration
 DEFAULT_BASE_WPM = 85  # Base typing speed (increased from 65)
+WPM_RANGE = (10, 300)  # Speeds accepted from the user
 WPM_VARIATION = 0.3    # 30% variation (±25 WPM from base)
 FATIGUE_FACTOR = 0.12  # 12% slowdown over time (reduced from 15%)
 BURST_CHANCE = 0.10    # 10% chance of fast burst (increased from 8%)
 HESITATION_CHANCE = 0.04  # 4% chance of hesitation (reduced from 5%)
 
+# Keystroke output: 'pyautogui', 'x11' (python-xlib XTest), 'recording' or 'null'
+OUTPUT_BACKEND = 'pyautogui'
+
+# Keystroke scheduling
+MAX_SCHEDULE_LAG = 0.25  # Drop schedule debt past 250ms rather than burst to catch up
+
+# Precision timer: sleep coarsely, then finish the last stretch of each delay precisely
+# Modes: 'sleep', 'yield' (sched_yield loop), 'spin' (busy loop, most CPU),
+# 'nanosleep' (clock_nanosleep) or 'timerfd' (Linux, Python 3.13+)
+TIMER_MODE = 'yield'
+TIMER_SPIN_MARGIN = None       # Seconds left for the precise finish; None calibrates
+TIMER_MAX_MARGIN = 0.003       # Calibration never hands more than 3ms to the finish
+
+# Key batching: runs of keys planned closer together than this go out in one
+# backend call
+KEY_BATCH_THRESHOLD = None     # e.g. 0.015; None sends every key on its own
+KEY_BATCH_MAX = 32             # Longest batch, so pause and stop still land promptly
+
+# Closed-loop speed control: planned delays are scaled so the achieved WPM
+# converges on the target
+WPM_CONTROL = True
+WPM_CONTROL_WINDOW = 40          # Keystrokes the achieved rate is measured over
+WPM_CONTROL_GAINS = (0.6, 0.3)   # Proportional and integral gain on the log rate error
+WPM_CONTROL_LIMITS = (0.2, 5.0)  # Range the delay scale is kept in
+WPM_HOLD_THROUGH_FATIGUE = False  # True holds base_wpm to the end, not slowing down
+
+# Per-keystroke telemetry
+TELEMETRY_ENABLED = True
+TELEMETRY_CAPACITY = 100_000     # Most recent keystrokes kept for export
+TELEMETRY_EXPORT_PATH = None     # e.g. 'telemetry.csv' or '.json', written on stop
+
+# Typing output is written by a reporter thread, so a slow terminal or log never
+# stalls keys
+PROGRESS_INTERVAL = 1.0          # Seconds between [PROGRESS] updates
+PROGRESS_JSON_PATH = None        # Also write JSON-lines events here; '-' replaces text
+
+# Reproducible sessions: an int seed replays the same delays, flow changes and typos.
+# With None each plan draws its own seed and prints it, so any session can be replayed.
+SESSION_SEED = None
+PLAN_CACHE_DIR = None  # e.g. 'plans', keeps built delay plans on disk for instant reuse
+
+# Large documents are planned in chunks on worker processes; typing starts after
+# the first chunk
+PLAN_CHUNK_CHARS = 1_000_000
+PLAN_PARALLEL_MIN_CHARS = 2_000_000
+PLAN_WORKERS = None    # Planner processes; None uses all CPUs but one
+
+# Timing model fitted by calibrate.py, loaded at startup in place of the constants below
+TIMING_MODEL_PATH = 'timing_model.json'
+
+# Cleaned-text cache shared by typing and status refreshes
+DOCUMENT_CACHE_ENTRIES = 16
+DOCUMENT_CACHE_BYTES = 256 * 1024 * 1024  # 256MB across cleaned texts and plans
+
+# Resume checkpoints, journaled to disk so a crash or restart keeps the position
+CHECKPOINT_PATH = 'autotyper_checkpoints.jsonl'  # None keeps positions in memory only
+CHECKPOINT_EVERY_KEYS = 50     # Write the position at least every 50 keystrokes...
+CHECKPOINT_INTERVAL = 0.5      # ...or every 500ms, whichever comes first
+CHECKPOINT_COMPACT_RECORDS = 1000  # Rewrite the journal past this many stale records
+
+# Resuming after the copied text was edited: continue from the first changed character
+RESUME_MIN_MATCH = 32          # Shortest shared prefix that counts as an edit
+RESUME_ERASE_DIVERGED = True   # Backspace over typed text that no longer matches
+
+# Clipboard watcher: clean, index and plan copied text before a hotkey is pressed
+CLIPBOARD_WATCH = False        # Opt in: polls the clipboard while the tool is open
+CLIPBOARD_POLL_MIN = 0.1       # Poll every 100ms right after a change...
+CLIPBOARD_POLL_MAX = 2.0       # ...backing off to every 2s while nothing changes
+CLIPBOARD_POLL_BACKOFF = 1.5
+
+# Local control socket for automation: a Unix socket path, or 'localhost:<port>'
+# for TCP. The Unix socket is private to your user (mode 600). TCP has no
+# authentication, so any local process or user that can reach the port can make
+# it type.
+CONTROL_ADDRESS = None         # e.g. '/tmp/autotyper.sock'
+CONTROL_MAX_REQUEST = 256 * 1024 * 1024  # Longest request; submit sends whole texts
+
 # Enhanced human-like timing with Gaussian distribution
 MICRO_PAUSE_CHANCE = 0.15  # 15% chance of tiny micro-pauses
 RHYTHM_VARIATION = 0.4     # 40% rhythm variation between keystrokes
 TYPING_FLOW_STATES = ['steady', 'rushed', 'careful', 'thinking']
+FLOW_CHANGE_MIN = 12       # Flow state changes every 12-35 characters
+FLOW_CHANGE_MAX = 35
+
+# Typos are planned with the delays: mistakes hit keys next to the intended one
+KEYBOARD_LAYOUT = 'qwerty'     # 'qwerty', 'azerty' or 'dvorak'
+TYPO_RATE = 0.006              # 0.6% chance of a typo at each printable character
+TYPO_KINDS = {                 # Relative weight of each kind of mistake
+    'substitution': 0.45,      # Neighbouring key, noticed straight away
+    'late': 0.15,              # Neighbouring key, noticed 1-3 characters later
+    'transposition': 0.15,     # Two characters swapped
+    'doubled': 0.15,           # Key repeated
+    'dropped': 0.10,           # Key skipped
+}
 
-def get_typing_flow_state():
+# Flow state modifiers
+FLOW_MODIFIERS = {
+    'steady': 1.0,      # Normal typing
+    'rushed': 0.65,     # Typing quickly (improved from 0.7)
+    'careful': 1.5,     # Deliberate typing (improved from 1.4)
+    'thinking': 2.0     # Thoughtful typing (improved from 1.8)
+}
+
+# Common letter combinations (faster) and difficult ones (slower)
+COMMON_BIGRAMS = frozenset([
+    'th', 'he', 'in', 'er', 'an', 're', 'ed', 'nd', 'on', 'en', 
+    'at', 'ou', 'it', 'is', 'or', 'ti', 'hi', 'st', 'io', 'le', 
+    'ea', 'ng', 'ar', 've', 'te', 'co', 'to', 'al', 'de', 'se'
+])
+DIFFICULT_BIGRAMS = frozenset(['qu', 'x', 'z', 'qw', 'xz', 'jp', 'fj'])
+
+# Character classes for the delay planner and their modifier ranges
+CHAR_PLAIN = 0
+CHAR_SENTENCE_END = 1
+CHAR_PUNCTUATION = 2
+CHAR_SPACE_AFTER_SENTENCE = 3
+CHAR_SPACE_AFTER_PUNCTUATION = 4
+CHAR_SPACE = 5
+CHAR_CAPS_TRANSITION = 6
+CHAR_DIGIT = 7
+CHAR_BRACKET = 8
+CHAR_QUOTE = 9
+CHAR_SYMBOL = 10
+CHAR_NEWLINE = 11
+CHAR_TAB = 12
+CHAR_CARRIAGE_RETURN = 13
+
+CHAR_CLASS_RANGES = [
+    (1.0, 1.0),  # Plain characters
+    (2.5, 4.0),  # Sentence endings
+    (1.4, 2.5),  # Punctuation
+    (0.3, 0.6),  # Quick space after sentence
+    (0.5, 0.8),  # Medium space after punctuation
+    (0.7, 1.1),  # Normal word spacing
+    (1.1, 1.4),  # Caps transition
+    (1.2, 1.6),  # Numbers
+    (1.3, 1.8),  # Brackets
+    (1.0, 1.3),  # Quotes
+    (1.4, 2.0),  # Special symbols
+    (1.5, 2.5),  # New lines
+    (1.0, 1.5),  # Tabs
+    (1.0, 1.0),  # Carriage returns (skipped while typing)
+]
+
+# Class names used in timing model files
+CHAR_CLASS_NAMES = (
+    'plain', 'sentence_end', 'punctuation', 'space_after_sentence',
+    'space_after_punctuation', 'space', 'caps_transition', 'digit', 'bracket', 'quote',
+    'symbol', 'newline', 'tab', 'carriage_return',
+)
+
+# Bigram classes and their modifier ranges
+BIGRAM_NONE = 0
+BIGRAM_COMMON = 1
+BIGRAM_DIFFICULT = 2
+
+BIGRAM_CLASS_RANGES = [
+    (1.0, 1.0),  # No adjustment
+    (0.6, 0.8),  # Faster for common patterns
+    (1.2, 1.5),  # Slower for difficult combinations
+]
+BIGRAM_CLASS_NAMES = ('none', 'common', 'difficult')
+
+def get_typing_flow_state(rng=random):
     """Randomly select a typing flow state that affects multiple characters"""
-    return random.choice(TYPING_FLOW_STATES)
+    return rng.choice(TYPING_FLOW_STATES)
 
-def human_delay_gaussian(mean_wpm=85, std_factor=0.3):
+def human_delay_gaussian(mean_wpm=85, std_factor=0.3, rng=random):
     """Generate human-like delays using Gaussian distribution or fallback"""
     # Convert WPM to character delay (5 chars per word average)
     chars_per_second = (mean_wpm * 5) / 60
@@ -50,239 +288,2814 @@ def human_delay_gaussian(mean_wpm=85, std_factor=0.3):
     if HAS_NUMPY:
         # Use Gaussian distribution for more natural variation
         std_delay = base_delay * std_factor
-        delay = np.random.normal(base_delay, std_delay)
+        delay = rng.gauss(base_delay, std_delay)
     else:
         # Fallback to basic random variation
         variation = base_delay * std_factor
-        delay = random.uniform(base_delay - variation, base_delay + variation)
+        delay = rng.uniform(base_delay - variation, base_delay + variation)
+    
+    # Ensure minimum delay
+    return max(0.008, delay)
+
+# Text cleaning rules compiled into one pattern. Every match starts on a whitespace
+# character, so the scanner skips ordinary text in C. A match is either
+#   - a line break region: trailing whitespace, the newline(s), blank lines and the
+#     next line's leading whitespace (kept when the line is tab-indented), or
+#   - a run of two or more spaces inside a line.
+# Lone spaces and clean "\n"/"\n\n" breaks are rejected up front so they never
+# reach Python.
+_CLEAN_PATTERN = re.compile(
+    r'\s(?=\s|(?<=\n))(?:'
+    r'(?:(?<=\n)(?!\n?(?:\S|\t[^\S\n]*\S))|(?<![^\S\n][^\S\n])(?<!\n)[^\S\n]*\n)'
+    r'(?:[^\S\n]*(\n))?(?:[^\S\n]*\n)*(?:[^\S\n\t][^\S\n]*)?'
+    r'|(?<= )( +))'
+)
+# Replacement by the last group matched: one newline, two newlines, or a space
+_CLEAN_REPLACEMENTS = {None: '\n', 1: '\n\n', 2: ' '}
+
+def _clean_replacement(match):
+    return _CLEAN_REPLACEMENTS[match.lastindex]
+
+def clean_clipboard_text_advanced(text):
+    """Enhanced text cleaning with better whitespace handling"""
+    if not text:
+        return text
+    
+    # Trailing spaces are dropped, runs of spaces collapse to one, leading
+    # whitespace goes unless the line is tab-indented, and at most one blank
+    # line is kept between paragraphs
+    return _CLEAN_PATTERN.sub(_clean_replacement, text.strip())
+
+def iter_clean_clipboard_text(chunks):
+    """Streaming clean_clipboard_text_advanced over an iterable of text chunks"""
+    pending = ''
+    started = False
+    
+    for chunk in chunks:
+        pending += chunk
+        if not started:
+            pending = pending.lstrip()
+            if not pending:
+                continue
+            started = True
+        
+        # Hold back trailing whitespace: it may belong to a region that
+        # continues in the next chunk, or be the end of the text
+        head = pending.rstrip()
+        if not head:
+            continue
+        pending = pending[len(head):]
+        yield _CLEAN_PATTERN.sub(_clean_replacement, head)
+
+def calculate_char_delay_enhanced(base_wpm, char, position, total_chars,
+                                  flow_state='steady', prev_char=None, rng=random):
+    """Enhanced delay calculation with Gaussian distribution and better human factors"""
+    
+    # Apply fatigue (gradual slowdown)
+    fatigue_multiplier = 1 + (FATIGUE_FACTOR * position / total_chars)
+    current_wpm = base_wpm / fatigue_multiplier
+    
+    # Use Gaussian distribution for more natural variation
+    base_delay = human_delay_gaussian(current_wpm, WPM_VARIATION, rng)
+    
+    # Flow state modifiers
+    flow_modifier = FLOW_MODIFIERS.get(flow_state, 1.0)
+    
+    # Character-specific and bigram modifiers from the class tables
+    code = ord(char)
+    prev = ord(prev_char) if prev_char else CLASS_TABLE_NO_PREV
+    if code < 128 and (prev < 128 or not prev_char):
+        index = prev << 7 | code
+        char_class, bigram_class = CHAR_CLASS_TABLE[index], BIGRAM_CLASS_TABLE[index]
+    else:
+        char_class = classify_char(char, prev_char)
+        bigram_class = classify_bigram(prev_char, char)
+    char_modifier = 1.0
+    if char_class:
+        char_modifier = rng.uniform(*CHAR_CLASS_RANGES[char_class])
+    if bigram_class:
+        char_modifier *= rng.uniform(*BIGRAM_CLASS_RANGES[bigram_class])
+    
+    # Enhanced typing patterns with Gaussian influence
+    pattern_roll = rng.random()
+    if pattern_roll < BURST_CHANCE:
+        char_modifier *= rng.uniform(0.2, 0.5)  # Fast burst
+    elif pattern_roll < BURST_CHANCE + HESITATION_CHANCE:
+        char_modifier *= rng.uniform(2.0, 3.5)  # Hesitation
+    elif pattern_roll < BURST_CHANCE + HESITATION_CHANCE + MICRO_PAUSE_CHANCE:
+        char_modifier *= rng.uniform(1.2, 1.8)  # Micro-pause
+    
+    # Apply all modifiers
+    final_delay = base_delay * char_modifier * flow_modifier
+    
+    # Add small jitter
+    jitter = rng.uniform(-0.01, 0.01)
+    final_delay = max(0.005, final_delay + jitter)
+    
+    return final_delay
+
+def classify_char(char, prev_char=None):
+    """Return the character class; the lookup tables are compiled from this function"""
+    if char in '.!?':
+        return CHAR_SENTENCE_END
+    if char in ',;:':
+        return CHAR_PUNCTUATION
+    if char == ' ':
+        if prev_char and prev_char in '.!?':
+            return CHAR_SPACE_AFTER_SENTENCE
+        if prev_char and prev_char in ',;:':
+            return CHAR_SPACE_AFTER_PUNCTUATION
+        return CHAR_SPACE
+    if char.isupper() and prev_char and prev_char.islower():
+        return CHAR_CAPS_TRANSITION
+    if char.isdigit():
+        return CHAR_DIGIT
+    if char in '()[]{}':
+        return CHAR_BRACKET
+    if char in '"\'':
+        return CHAR_QUOTE
+    if char in '!@#$%^&*+=<>?':
+        return CHAR_SYMBOL
+    if char == '\n':
+        return CHAR_NEWLINE
+    if char == '\t':
+        return CHAR_TAB
+    if char == '\r':
+        return CHAR_CARRIAGE_RETURN
+    return CHAR_PLAIN
+
+def classify_bigram(prev_char, char):
+    """Return the bigram class for a character pair; registered bigrams come first"""
+    if not prev_char:
+        return BIGRAM_NONE
+    bigram = (prev_char + char).lower()
+    if bigram in BIGRAM_CLASS_OVERRIDES:
+        return BIGRAM_CLASS_OVERRIDES[bigram]
+    if bigram in COMMON_BIGRAMS:
+        return BIGRAM_COMMON
+    if bigram in DIFFICULT_BIGRAMS or char in 'qxz':
+        return BIGRAM_DIFFICULT
+    return BIGRAM_NONE
+
+# Dense class tables over ASCII pairs: entry (prev << 7) | char holds the class of char
+# typed after prev, with row 128 for the first character. Pairs involving any other
+# code point fall back to classify_char/classify_bigram.
+CLASS_TABLE_NO_PREV = 128
+CHAR_CLASS_TABLE = bytearray(129 * 128)
+BIGRAM_CLASS_TABLE = bytearray(129 * 128)
+BIGRAM_CLASS_OVERRIDES = {}  # Lowercase bigram -> class, from register_bigram_class()
+CLASSIFY_BLOCK = 1 << 20     # Characters classified per vectorized block
+
+def build_class_tables():
+    """Compile the classification rules into CHAR_CLASS_TABLE and BIGRAM_CLASS_TABLE"""
+    chars = [chr(code) for code in range(128)]
+    
+    # classify_char only asks whether the previous character ends a sentence, is
+    # punctuation or is lowercase, so one row per answer covers every previous character
+    rows = {}
+    for prev, prev_char in enumerate(chars + [None]):
+        kind = ('.' if prev_char in '.!?' else ',' if prev_char in ',;:'
+                else 'a' if prev_char.islower() else None) if prev_char else None
+        if kind not in rows:
+            rows[kind] = bytes(classify_char(char, kind) for char in chars)
+        CHAR_CLASS_TABLE[prev << 7:(prev + 1) << 7] = rows[kind]
+    
+    # Bigram classes: the per-character default, then each set in increasing precedence
+    default_row = bytes(BIGRAM_DIFFICULT if char in 'qxz' else BIGRAM_NONE
+                        for char in chars)
+    BIGRAM_CLASS_TABLE[:128 << 7] = default_row * 128
+    BIGRAM_CLASS_TABLE[128 << 7:] = bytes(128)  # No previous character
+    layers = [(DIFFICULT_BIGRAMS, BIGRAM_DIFFICULT), (COMMON_BIGRAMS, BIGRAM_COMMON)]
+    layers += [((bigram,), code) for bigram, code in BIGRAM_CLASS_OVERRIDES.items()]
+    for bigrams, code in layers:
+        for bigram in bigrams:
+            if len(bigram) != 2 or not bigram.isascii():
+                continue  # Reached through classify_bigram instead
+            for prev_char in {bigram[0], bigram[0].upper()}:
+                for char in {bigram[1], bigram[1].upper()}:
+                    if (prev_char + char).lower() == bigram:
+                        BIGRAM_CLASS_TABLE[ord(prev_char) << 7 | ord(char)] = code
+
+def register_bigram_class(bigrams, factor_range, rebuild=True):
+    """Add a bigram class with its own modifier range and return its code"""
+    code = len(BIGRAM_CLASS_RANGES)
+    if code > 255:
+        raise ValueError("At most 256 bigram classes are supported")
+    bigrams = [bigram.lower() for bigram in bigrams]
+    for bigram in bigrams:
+        if len(bigram) != 2:
+            raise ValueError(f"Bigrams must be two characters, got {bigram!r}")
+    
+    BIGRAM_CLASS_RANGES.append(tuple(factor_range))
+    for bigram in bigrams:
+        BIGRAM_CLASS_OVERRIDES[bigram] = code
+    if rebuild:
+        build_class_tables()
+    return code
+
+def lookup_classes(char, prev_char=None):
+    """Character and bigram class of char typed after prev_char"""
+    code = ord(char)
+    prev = ord(prev_char) if prev_char else CLASS_TABLE_NO_PREV
+    if code < 128 and (prev < 128 or not prev_char):
+        return CHAR_CLASS_TABLE[prev << 7 | code], BIGRAM_CLASS_TABLE[prev << 7 | code]
+    return classify_char(char, prev_char), classify_bigram(prev_char, char)
+
+def classify_text(text):
+    """Character and bigram class arrays for a whole text, looked up in blocks"""
+    total_chars = len(text)
+    char_classes = np.empty(total_chars, dtype=np.uint8)
+    bigram_classes = np.empty(total_chars, dtype=np.uint8)
+    char_table = np.frombuffer(CHAR_CLASS_TABLE, dtype=np.uint8)
+    bigram_table = np.frombuffer(BIGRAM_CLASS_TABLE, dtype=np.uint8)
+    
+    for start in range(0, total_chars, CLASSIFY_BLOCK):
+        end = min(start + CLASSIFY_BLOCK, total_chars)
+        first = max(start - 1, 0)
+        codes = np.frombuffer(text[first:end].encode('utf-32-le', 'surrogatepass'),
+                              dtype=np.uint32)
+        if start == 0:
+            prev = np.concatenate(([CLASS_TABLE_NO_PREV], codes[:-1]))
+        else:
+            prev, codes = codes[:-1], codes[1:]
+        
+        slots = np.minimum(prev, 128) << 7 | np.minimum(codes, 127)
+        char_classes[start:end] = char_table[slots]
+        bigram_classes[start:end] = bigram_table[slots]
+        
+        # Pairs outside ASCII go through the classifier functions
+        outside = (codes >= 128) | (prev >= 128)
+        if start == 0:
+            outside[0] = codes[0] >= 128  # Row 128 is the no-previous marker here
+        for i in np.flatnonzero(outside) + start:
+            char, prev_char = text[i], text[i - 1] if i else None
+            char_classes[i] = classify_char(char, prev_char)
+            bigram_classes[i] = classify_bigram(prev_char, char)
+    
+    return char_classes, bigram_classes
+
+build_class_tables()
+
+# Digest of the loaded timing model, so saved plans from another model are not reused
+timing_model_digest = None
+
+def load_timing_model(path=None):
+    """Replace the hand-tuned timing constants with a model written by calibrate.py"""
+    global WPM_VARIATION, FATIGUE_FACTOR, timing_model_digest
+    
+    with open(path or TIMING_MODEL_PATH, encoding='utf-8') as f:
+        model = json.load(f)
+    if model.get('version') != 1:
+        raise ValueError(f"Unsupported timing model version {model.get('version')!r}")
+    
+    WPM_VARIATION = model.get('wpm_variation', WPM_VARIATION)
+    FATIGUE_FACTOR = model.get('fatigue_factor', FATIGUE_FACTOR)
+    for name, bounds in model.get('char_class_ranges', {}).items():
+        CHAR_CLASS_RANGES[CHAR_CLASS_NAMES.index(name)] = tuple(bounds)
+    for name, bounds in model.get('bigram_class_ranges', {}).items():
+        BIGRAM_CLASS_RANGES[BIGRAM_CLASS_NAMES.index(name)] = tuple(bounds)
+    
+    # Fitted bigrams replace any registered before
+    del BIGRAM_CLASS_RANGES[len(BIGRAM_CLASS_NAMES):]
+    BIGRAM_CLASS_OVERRIDES.clear()
+    for group in model.get('bigram_classes', []):
+        register_bigram_class(group['bigrams'], group['range'], rebuild=False)
+    build_class_tables()
+    
+    timing_model_digest = content_hash(json.dumps(model, sort_keys=True))
+    document_cache.clear()  # Plans built under the old constants are stale
+    return model
+
+# Delay plan files: magic, little-endian header length, JSON header, then the raw
+# delay (float32) and flow code (uint8) buffers at 64-byte aligned offsets
+PLAN_FILE_MAGIC = b'ATPLAN\x00\x03'
+PLAN_FILE_ALIGN = 64
+PLAN_BLOCK_CHARS = 4096  # remaining_time() keeps one running total per block of delays
+
+# Key rows per layout, each with its stagger from the left edge in key widths
+KEYBOARD_LAYOUTS = {
+    'qwerty': ((0.0, '`1234567890-='), (1.5, 'qwertyuiop[]\\'),
+               (1.75, "asdfghjkl;'"), (2.25, 'zxcvbnm,./')),
+    'azerty': ((0.0, '²&é"\'(-è_çà)='), (1.5, 'azertyuiop^$'),
+               (1.75, 'qsdfghjklmù*'), (1.25, '<wxcvbn,;:!')),
+    'dvorak': ((0.0, '`1234567890[]'), (1.5, "',.pyfgcrl/=\\"),
+               (1.75, 'aoeuidhtns-'), (2.25, ';qjkxbmwvz')),
+}
+_KEY_NEIGHBOURS = {}  # layout -> {key: neighbouring keys}
+
+TYPO_BACKSPACE = '\b'  # Typo action key that erases the previous character
+
+def key_neighbours(layout=None):
+    """Keys physically next to each key of a layout, built on first use"""
+    layout = layout or KEYBOARD_LAYOUT
+    neighbours = _KEY_NEIGHBOURS.get(layout)
+    if neighbours is None:
+        rows = KEYBOARD_LAYOUTS[layout]
+        places = {key: (row, offset + column)
+                  for row, (offset, keys) in enumerate(rows)
+                  for column, key in enumerate(keys)}
+        neighbours = {}
+        for key, (row, x) in places.items():
+            neighbours[key] = ''.join(
+                other for other, (other_row, other_x) in places.items()
+                if other != key and (
+                    (other_row == row and abs(other_x - x) == 1)
+                    or (abs(other_row - row) == 1 and abs(other_x - x) < 1)))
+        neighbours[' '] = rows[-1][1][2:7]  # The space bar is under the bottom row
+        _KEY_NEIGHBOURS[layout] = neighbours
+    return neighbours
+
+class TypoPlan:
+    """Planned typos: each event is the keys sent just before the character it's at"""
+    
+    def __init__(self, positions=None, offsets=None, keys='', delays=None):
+        # Event n sends keys[offsets[n]:offsets[n + 1]] just before text[positions[n]],
+        # waiting delays[i] seconds after keys[i]; positions ascend
+        self.positions = positions if positions is not None else array('q')
+        self.offsets = offsets if offsets is not None else array('q', [0])
+        self.keys = keys
+        self.delays = delays if delays is not None else array('d')
+        self._elapsed = None  # Suffix sums of event durations, for remaining_time()
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def first_from(self, position):
+        """Index of the first event at or after position"""
+        return bisect_left(self.positions, position)
+    
+    def actions(self, event):
+        """(key, delay after it) pairs of one event"""
+        start, end = self.offsets[event], self.offsets[event + 1]
+        return zip(self.keys[start:end], self.delays[start:end])
+    
+    def remaining_time(self, position):
+        """Seconds the typos from position onwards add"""
+        if self._elapsed is None:
+            offsets = self.offsets
+            totals = [sum(self.delays[offsets[n]:offsets[n + 1]])
+                      for n in range(len(self))]
+            self._elapsed = array('d', [0.0])
+            self._elapsed.extend(accumulate(reversed(totals)))
+            self._elapsed.reverse()
+        return self._elapsed[self.first_from(position)]
+    
+    @property
+    def nbytes(self):
+        return 8 * len(self.positions) + 8 * len(self.offsets) + 16 * len(self.delays)
+
+class TypoCursor:
+    """The next planned typo at or after a typing position"""
+    __slots__ = ('typos', 'event', 'position')
+    
+    def __init__(self, typos, position=0):
+        self.typos = typos
+        self.seek(position)
+    
+    def seek(self, position):
+        """Move to the first event at or after position"""
+        self.event = self.typos.first_from(position)
+        self._update()
+    
+    def advance(self):
+        """Move past the current event"""
+        self.event += 1
+        self._update()
+    
+    def _update(self):
+        typos = self.typos
+        if self.event < len(typos):
+            self.position = typos.positions[self.event]
+        else:
+            self.position = -1  # None left
+
+def plan_typos(text, delays, seed, layout=None, rate=None):
+    """Choose where typos happen and the keys each sends, so typing never branches"""
+    typos = TypoPlan()
+    rate = TYPO_RATE if rate is None else rate
+    if rate <= 0 or not text:
+        return typos
+    
+    neighbours = key_neighbours(layout)
+    rng = random.Random(f"{seed}:typos")
+    kinds, weights = list(TYPO_KINDS), list(TYPO_KINDS.values())
+    log_miss = math.log1p(-rate) if rate < 1 else None
+    keys = []
+    position = -1
+    while True:
+        # Geometric gaps between candidates: one draw per typo, not per character
+        if log_miss is None:
+            position += 1
+        else:
+            position += int(math.log(1.0 - rng.random()) / log_miss) + 1
+        if position >= len(text):
+            break
+        if not text[position].isprintable():
+            continue
+        kind = rng.choices(kinds, weights)[0]
+        event = _typo_actions(text, delays, position, kind, neighbours, rng)
+        if event is None:
+            continue
+        at, actions = event
+        if at >= len(text) or (typos.positions and at <= typos.positions[-1]):
+            continue  # At most one event per position
+        typos.positions.append(at)
+        for key, delay in actions:
+            keys.append(key)
+            typos.delays.append(delay)
+        typos.offsets.append(len(keys))
+    typos.keys = ''.join(keys)
+    return typos
+
+def _typo_actions(text, delays, position, kind, neighbours, rng):
+    """(event position, [(key, delay), ...]) for one typo, or None where it can't be"""
+    char = text[position]
+    following = text[position + 1:position + 4]
+    if kind in ('transposition', 'dropped') and not (
+            following and following[0].isprintable() and following[0] != char):
+        kind = 'substitution'
+    typed = rng.randint(1, 3) if kind == 'late' else 0
+    if kind == 'late' and (len(following) < typed
+                           or not following[:typed].isprintable()):
+        kind = 'substitution'
+    
+    notice = rng.uniform(0.08, 0.25)   # Noticing the mistake
+    correct = rng.uniform(0.03, 0.12)  # Last backspace to the right key
+    if kind == 'doubled':
+        return position + 1, [(char, notice), (TYPO_BACKSPACE, correct)]
+    if kind == 'dropped':
+        return position, [(following[0], notice), (TYPO_BACKSPACE, correct)]
+    if kind == 'transposition':
+        return position, [(following[0], float(delays[position])), (char, notice),
+                          (TYPO_BACKSPACE, rng.uniform(0.03, 0.08)),
+                          (TYPO_BACKSPACE, correct)]
+    
+    near = neighbours.get(char.lower() if char.isupper() else char)
+    if char.isupper() and near:
+        near = [key.upper() for key in near if key.isalpha()]
+    if not near:
+        return None
+    wrong = rng.choice(near)
+    if kind == 'substitution':
+        return position, [(wrong, notice), (TYPO_BACKSPACE, correct)]
+    
+    # Late: keep typing a few characters before noticing, then erase them all
+    sent = [wrong] + list(following[:typed])
+    actions = [(key, float(delays[position + n])) for n, key in enumerate(sent)]
+    actions[-1] = (sent[-1], notice)
+    actions += [(TYPO_BACKSPACE, rng.uniform(0.03, 0.08)) for _ in sent[1:]]
+    actions.append((TYPO_BACKSPACE, correct))
+    return position, actions
+
+def typo_settings():
+    """Settings typo plans depend on, recorded in saved plans"""
+    kinds = ','.join(f"{kind}={weight}" for kind, weight in TYPO_KINDS.items())
+    return f"{KEYBOARD_LAYOUT}:{TYPO_RATE}:{kinds}"
+
+class DelayPlan:
+    """Precomputed delay schedule for a cleaned text, one entry per character"""
+
+    def __init__(self, text, base_wpm, delays, flow_codes, seed=None, planner=None,
+                 typos=None):
+        self.text = text
+        self.base_wpm = base_wpm
+        self.delays = delays          # Seconds to wait after each character (float32)
+        self.flow_codes = flow_codes  # Index into TYPING_FLOW_STATES (uint8)
+        self.seed = seed              # Seed the plan was drawn from, for replays
+        self.planner = planner        # 'numpy' or 'python'; seeds replay per planner
+        self.typos = typos if typos is not None else TypoPlan()
+        self.ready = len(delays)      # Entries planned so far; less while chunks arrive
+        self._elapsed = None          # Suffix sums of block delays (remaining_time)
+
+    def __len__(self):
+        return len(self.delays)
+    
+    def wait_ready(self, position, timeout=None):
+        """Block until position is planned (or timeout); returns self.ready"""
+        return self.ready
+    
+    def when_complete(self, callback):
+        """Call callback once every entry is planned"""
+        callback()
+
+    def flow_state(self, position):
+        """Flow state active at a character position"""
+        return TYPING_FLOW_STATES[self.flow_codes[position]]
+    
+    def view(self, start, stop=None):
+        """Delays from start to stop without copying: a NumPy view or a memoryview"""
+        if HAS_NUMPY and isinstance(self.delays, np.ndarray):
+            return self.delays[start:stop]
+        return memoryview(self.delays)[start:stop]
+    
+    def delay_sum(self, start, stop=None):
+        """Seconds planned from start to stop, summed in double precision"""
+        delays = self.view(start, stop)
+        if HAS_NUMPY and isinstance(delays, np.ndarray):
+            return float(delays.sum(dtype=np.float64))
+        return math.fsum(delays)
+    
+    def remaining_time(self, position):
+        """Planned seconds from position to the end, via per-block totals built once"""
+        count = len(self.delays)
+        if self._elapsed is None:
+            totals = [self.delay_sum(start, start + PLAN_BLOCK_CHARS)
+                      for start in range(0, count, PLAN_BLOCK_CHARS)]
+            self._elapsed = array('d', [0.0])
+            self._elapsed.extend(accumulate(reversed(totals)))
+            self._elapsed.reverse()
+        position = min(max(position, 0), count)
+        block = position // PLAN_BLOCK_CHARS
+        # The block total minus the part of it before position
+        before = self.delay_sum(block * PLAN_BLOCK_CHARS, position)
+        return self._elapsed[block] - before + self.typos.remaining_time(position)
+    
+    @property
+    def nbytes(self):
+        """Approximate memory held by the plan arrays"""
+        elapsed_bytes = 0 if self._elapsed is None else len(self._elapsed) * 8
+        elapsed_bytes += self.typos.nbytes
+        if HAS_NUMPY and isinstance(self.delays, np.ndarray):
+            return self.delays.nbytes + self.flow_codes.nbytes + elapsed_bytes
+        delay_bytes = len(self.delays) * self.delays.itemsize
+        return delay_bytes + len(self.flow_codes) + elapsed_bytes
+    
+    def save(self, path):
+        """Write the plan to a binary file that load_delay_plan can memory-map"""
+        typos = self.typos
+        header = {
+            'version': 3,
+            'count': len(self),
+            'base_wpm': self.base_wpm,
+            'seed': self.seed,
+            'planner': self.planner,
+            'digest': content_hash(self.text),
+            'typo_settings': typo_settings(),
+            'typo_events': len(typos),
+            'typo_actions': len(typos.delays),
+        }
+        # Offsets depend on the header size, which depends on the offsets' digits
+        for field in ('delays_offset', 'flow_codes_offset', 'typos_offset'):
+            header[field] = 0
+        prefix = len(PLAN_FILE_MAGIC) + 4 + len(json.dumps(header)) + 60
+        header['delays_offset'] = -(-prefix // PLAN_FILE_ALIGN) * PLAN_FILE_ALIGN
+        header['flow_codes_offset'] = header['delays_offset'] + 4 * len(self)
+        header['typos_offset'] = header['flow_codes_offset'] + len(self)
+        encoded = json.dumps(header).encode('utf-8')
+        
+        # Typos follow as positions, offsets and delays (little-endian) then UTF-32 keys
+        typo_arrays = [array('q', typos.positions), array('q', typos.offsets),
+                       array('d', typos.delays)]
+        if sys.byteorder == 'big':
+            for values in typo_arrays:
+                values.byteswap()
+        
+        if HAS_NUMPY and isinstance(self.delays, np.ndarray):
+            delays = memoryview(np.ascontiguousarray(self.delays, dtype='<f4'))
+            flow_codes = memoryview(
+                np.ascontiguousarray(self.flow_codes, dtype=np.uint8))
+        else:
+            delays = array('f', self.delays)
+            if sys.byteorder == 'big':
+                delays.byteswap()
+            flow_codes = bytes(self.flow_codes)
+        
+        # Write beside the target and rename, so readers never see a partial plan
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(PLAN_FILE_MAGIC)
+            f.write(struct.pack('<I', len(encoded)))
+            f.write(encoded)
+            f.write(b'\x00' * (header['delays_offset'] - f.tell()))
+            f.write(delays)
+            f.write(flow_codes)
+            for values in typo_arrays:
+                f.write(values)
+            f.write(typos.keys.encode('utf-32-le'))
+        os.replace(temp_path, path)
+
+def load_delay_plan(path, text, digest=None):
+    """Load a saved plan for text, memory-mapped when NumPy is available"""
+    with open(path, 'rb') as f:
+        if f.read(len(PLAN_FILE_MAGIC)) != PLAN_FILE_MAGIC:
+            raise ValueError(f"{path} is not a delay plan file")
+        (header_length,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_length))
+        
+        count = header['count']
+        if count != len(text) or header['digest'] != (digest or content_hash(text)):
+            raise ValueError(f"{path} was planned for a different text")
+        if header['typo_settings'] != typo_settings():
+            raise ValueError(f"{path} was planned with different typo settings")
+        
+        f.seek(header['typos_offset'])
+        events, actions = header['typo_events'], header['typo_actions']
+        typo_arrays = [array('q'), array('q'), array('d')]
+        for values, length in zip(typo_arrays, (events, events + 1, actions)):
+            values.frombytes(f.read(8 * length))
+            if sys.byteorder == 'big':
+                values.byteswap()
+        keys = f.read(4 * actions).decode('utf-32-le')
+        typos = TypoPlan(*typo_arrays[:2], keys, typo_arrays[2])
+        
+        if HAS_NUMPY and count:
+            delays = np.memmap(f, dtype='<f4', mode='r',
+                               offset=header['delays_offset'], shape=(count,))
+            flow_codes = np.memmap(f, dtype=np.uint8, mode='r',
+                                   offset=header['flow_codes_offset'], shape=(count,))
+        elif HAS_NUMPY:
+            delays = np.zeros(0, dtype=np.float32)
+            flow_codes = np.zeros(0, dtype=np.uint8)
+        else:
+            f.seek(header['delays_offset'])
+            delays = array('f')
+            delays.frombytes(f.read(4 * count))
+            if sys.byteorder == 'big':
+                delays.byteswap()
+            f.seek(header['flow_codes_offset'])
+            flow_codes = array('B', f.read(count))
+    
+    return DelayPlan(text, header['base_wpm'], delays, flow_codes, header['seed'],
+                     header['planner'], typos)
+
+def build_delay_plan(text, base_wpm=DEFAULT_BASE_WPM, seed=None):
+    """Compute the whole delay schedule up front; the typing loop only indexes it"""
+    if seed is None:
+        seed = random.getrandbits(63)  # Still recorded, so the plan can be rebuilt
+    if HAS_NUMPY and len(text) >= PLAN_PARALLEL_MIN_CHARS:
+        plan = start_delay_plan(text, base_wpm, seed)
+        plan.wait_ready(len(text) - 1)
+        if plan.error is not None:
+            raise plan.error
+        return plan
+    if HAS_NUMPY:
+        plan = _build_delay_plan_numpy(text, base_wpm, np.random.default_rng(seed))
+    else:
+        plan = _build_delay_plan_python(text, base_wpm, random.Random(seed))
+    plan.seed = seed
+    plan.typos = plan_typos(text, plan.delays, seed)
+    return plan
+
+def _build_delay_plan_python(text, base_wpm, rng):
+    """Pure-Python planner: the per-character model evaluated once per position"""
+    total_chars = len(text)
+    delays = array('f')
+    flow_codes = array('B')
+    flow_code = TYPING_FLOW_STATES.index(get_typing_flow_state(rng))
+    flow_change_counter = 0
+    prev_char = None
+    
+    for i, char in enumerate(text):
+        flow_change_counter += 1
+        if flow_change_counter > rng.randint(FLOW_CHANGE_MIN, FLOW_CHANGE_MAX):
+            flow_code = TYPING_FLOW_STATES.index(get_typing_flow_state(rng))
+            flow_change_counter = 0
+        flow_codes.append(flow_code)
+        
+        if char == '\r':
+            delays.append(0.0)
+            continue
+        
+        delays.append(calculate_char_delay_enhanced(
+            base_wpm, char, i, total_chars, TYPING_FLOW_STATES[flow_code],
+            prev_char, rng))
+        prev_char = char
+    
+    return DelayPlan(text, base_wpm, delays, flow_codes, planner='python')
+
+def _flow_segment_lengths(count, rng):
+    """Draw flow-state segment lengths distributed like the per-character counter"""
+    # The counter switches at step c when randint(MIN, MAX) < c
+    lengths = np.arange(FLOW_CHANGE_MIN + 1, FLOW_CHANGE_MAX + 2)
+    span = FLOW_CHANGE_MAX - FLOW_CHANGE_MIN + 1
+    hazard = (lengths - FLOW_CHANGE_MIN) / span
+    survival = np.concatenate(([1.0], np.cumprod(1.0 - hazard)[:-1]))
+    pmf = hazard * survival
+    return rng.choice(lengths, size=count, p=pmf / pmf.sum())
+
+def _plan_flow_codes(total_chars, rng):
+    """Flow state code for every character, switching in segments of 12-35 characters"""
+    segments = total_chars // FLOW_CHANGE_MIN + 2
+    lengths = _flow_segment_lengths(segments, rng)
+    lengths[0] -= 1  # The first segment starts with the counter already at one
+    codes = rng.integers(0, len(TYPING_FLOW_STATES), size=segments, dtype=np.uint8)
+    return np.repeat(codes, lengths)[:total_chars]
+
+def _build_delay_plan_numpy(text, base_wpm, rng):
+    """Vectorized planner: every random draw for the document is batched"""
+    delays, flow_codes = _plan_delays_numpy(text, base_wpm, rng)
+    return DelayPlan(text, base_wpm, delays, flow_codes, planner='numpy')
+
+def _plan_delays_numpy(text, base_wpm, rng, flow_codes=None, offset=0, total_chars=None,
+                       prev_char=None):
+    """Delays and flow codes for text, or for a chunk of a longer text at offset"""
+    count = len(text)
+    total_chars = total_chars or count
+    if count == 0:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.uint8)
+    
+    # Fatigue curve and Gaussian base delays (5 chars per word average)
+    progress = np.arange(offset, offset + count) / total_chars
+    fatigue_multiplier = 1 + FATIGUE_FACTOR * progress
+    base_delay = 12.0 * fatigue_multiplier / base_wpm
+    base_delay = np.maximum(0.008, rng.normal(base_delay, base_delay * WPM_VARIATION))
+    
+    # Flow state modifiers; chunks get theirs from the whole document, so segments
+    # span chunks
+    if flow_codes is None:
+        flow_codes = _plan_flow_codes(count, rng)
+    flow_table = np.array([FLOW_MODIFIERS[state] for state in TYPING_FLOW_STATES])
+    flow_modifier = flow_table[flow_codes]
+    
+    # Character-specific and bigram modifiers, with the bigram across a chunk boundary
+    if prev_char:
+        char_classes, bigram_classes = (classes[1:]
+                                        for classes in classify_text(prev_char + text))
+    else:
+        char_classes, bigram_classes = classify_text(text)
+    char_ranges = np.array(CHAR_CLASS_RANGES)[char_classes]
+    bigram_ranges = np.array(BIGRAM_CLASS_RANGES)[bigram_classes]
+    char_modifier = rng.uniform(char_ranges[:, 0], char_ranges[:, 1])
+    char_modifier *= rng.uniform(bigram_ranges[:, 0], bigram_ranges[:, 1])
+    
+    # Bursts, hesitations and micro-pauses
+    pattern_roll = rng.random(count)
+    burst = pattern_roll < BURST_CHANCE
+    hesitation = ~burst & (pattern_roll < BURST_CHANCE + HESITATION_CHANCE)
+    micro_pause = ~burst & ~hesitation & (
+        pattern_roll < BURST_CHANCE + HESITATION_CHANCE + MICRO_PAUSE_CHANCE)
+    char_modifier[burst] *= rng.uniform(0.2, 0.5, burst.sum())
+    char_modifier[hesitation] *= rng.uniform(2.0, 3.5, hesitation.sum())
+    char_modifier[micro_pause] *= rng.uniform(1.2, 1.8, micro_pause.sum())
+    
+    # Apply all modifiers and add small jitter
+    delays = base_delay * char_modifier * flow_modifier
+    delays += rng.uniform(-0.01, 0.01, count)
+    np.maximum(delays, 0.005, out=delays)
+    delays[char_classes == CHAR_CARRIAGE_RETURN] = 0.0
+    return delays.astype(np.float32), flow_codes
+
+# Module settings the planner reads, sent to worker processes with every chunk
+PLANNER_SETTINGS = (
+    'WPM_VARIATION', 'FATIGUE_FACTOR', 'BURST_CHANCE', 'HESITATION_CHANCE',
+    'MICRO_PAUSE_CHANCE', 'FLOW_MODIFIERS', 'CHAR_CLASS_RANGES', 'BIGRAM_CLASS_RANGES',
+    'BIGRAM_CLASS_OVERRIDES', 'KEYBOARD_LAYOUT', 'TYPO_RATE', 'TYPO_KINDS',
+)
+_applied_settings = None
+_plan_pool = None
+
+def _planner_settings():
+    return {name: globals()[name] for name in PLANNER_SETTINGS}
+
+def _plan_chunk(text, offset, total_chars, base_wpm, flow_codes, seed_sequence,
+                prev_char, settings=None):
+    """Delays and typos for one chunk; runs in a worker process when given settings"""
+    global _applied_settings
+    if settings is not None and settings != _applied_settings:
+        globals().update(settings)  # A timing model loaded in the parent, or new config
+        build_class_tables()
+        _applied_settings = settings
+    rng = np.random.default_rng(seed_sequence)
+    delays, _ = _plan_delays_numpy(text, base_wpm, rng, flow_codes, offset, total_chars,
+                                   prev_char)
+    return delays, plan_typos(text, delays, int(seed_sequence.generate_state(1)[0]))
+
+def _get_plan_pool():
+    """Process pool for chunked planning, started on first use"""
+    global _plan_pool
+    if _plan_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        workers = PLAN_WORKERS or max(1, (os.cpu_count() or 2) - 1)
+        # Spawned rather than forked: the parent has live event loop and typing threads
+        context = multiprocessing.get_context('spawn')
+        _plan_pool = ProcessPoolExecutor(workers, mp_context=context)
+    return _plan_pool
+
+class StreamingDelayPlan(DelayPlan):
+    """Chunked plan that fills in while typing runs; wait_ready() blocks ahead of it"""
+    
+    def __init__(self, text, base_wpm, delays, flow_codes, seed=None, planner=None):
+        super().__init__(text, base_wpm, delays, flow_codes, seed, planner)
+        self.ready = 0
+        self.error = None
+        self._filled = threading.Condition()
+        self._callbacks = []
+    
+    @property
+    def complete(self):
+        return self.ready >= len(self.delays)
+    
+    def wait_ready(self, position, timeout=None):
+        with self._filled:
+            self._filled.wait_for(
+                lambda: self.ready > position or self.error is not None, timeout)
+            return self.ready
+    
+    def when_complete(self, callback):
+        with self._filled:
+            if not self.complete:
+                self._callbacks.append(callback)
+                return
+        callback()
+    
+    def add_chunk(self, offset, delays, typos):
+        """Copy a planned chunk in; chunks must arrive in order"""
+        self.delays[offset:offset + len(delays)] = delays
+        planned = self.typos
+        base = len(planned.keys)
+        planned.keys += typos.keys
+        planned.delays.extend(typos.delays)
+        planned.offsets.extend(start + base for start in typos.offsets[1:])
+        # Positions go last: readers key off them
+        planned.positions.extend(position + offset for position in typos.positions)
+        
+        with self._filled:
+            self.ready = offset + len(delays)
+            self._filled.notify_all()
+            if not self.complete:
+                return
+            callbacks, self._callbacks = self._callbacks, []
+        self._elapsed = planned._elapsed = None
+        for callback in callbacks:
+            callback()
+    
+    def remaining_time(self, position):
+        """Exact once complete; until then extrapolated from the chunks planned"""
+        if self.complete:
+            return super().remaining_time(position)
+        ready = self.ready
+        position = min(max(position, 0), len(self.delays))
+        if position >= ready:
+            if not ready:
+                return 0.0
+            return self.delay_sum(0, ready) / ready * (len(self.delays) - position)
+        planned = self.delay_sum(position, ready)
+        return planned * (len(self.delays) - position) / (ready - position)
+    
+    def _fill(self, chunks, settings):
+        """Plan the remaining chunks on the process pool, adding each once it's next"""
+        try:
+            pool = _get_plan_pool()
+            futures = [pool.submit(_plan_chunk, *chunk, settings) for chunk in chunks]
+        except Exception:
+            futures = [None] * len(chunks)  # No worker processes: plan on this thread
+        try:
+            for chunk, future in zip(chunks, futures):
+                try:
+                    if future is not None:
+                        delays, typos = future.result()
+                    else:
+                        delays, typos = _plan_chunk(*chunk)
+                except Exception:
+                    delays, typos = _plan_chunk(*chunk)  # Same seed, so the same result
+                self.add_chunk(chunk[1], delays, typos)
+        except Exception as e:
+            print(f"[ERROR] ❌ Planning failed: {e}")
+            with self._filled:
+                self.error = e
+                self._filled.notify_all()
+
+def start_delay_plan(text, base_wpm=DEFAULT_BASE_WPM, seed=None):
+    """Plan text, returning as soon as the first chunk of a large text is ready"""
+    if not HAS_NUMPY or len(text) < PLAN_PARALLEL_MIN_CHARS:
+        return build_delay_plan(text, base_wpm, seed)
+    if seed is None:
+        seed = random.getrandbits(63)
+    
+    # Independent streams per chunk; flow states are drawn for the whole text so
+    # they span chunks
+    total_chars = len(text)
+    bounds = list(range(0, total_chars, PLAN_CHUNK_CHARS)) + [total_chars]
+    flow_seed, *chunk_seeds = np.random.SeedSequence(seed).spawn(len(bounds))
+    flow_codes = _plan_flow_codes(total_chars, np.random.default_rng(flow_seed))
+    chunks = [(text[start:end], start, total_chars, base_wpm, flow_codes[start:end],
+               chunk_seed, text[start - 1] if start else None)
+              for start, end, chunk_seed in zip(bounds, bounds[1:], chunk_seeds)]
+    
+    plan = StreamingDelayPlan(text, base_wpm, np.zeros(total_chars, dtype=np.float32),
+                              flow_codes, seed, 'numpy-chunked')
+    # On this thread, without waiting for workers to start
+    plan.add_chunk(0, *_plan_chunk(*chunks[0]))
+    if len(chunks) > 1:
+        threading.Thread(target=plan._fill, args=(chunks[1:], _planner_settings()),
+                         name='autotyper-planner', daemon=True).start()
+    return plan
+
+# Every code point str.isspace() accepts (the highest is U+3000)
+_WHITESPACE_CODES = [code for code in range(0x3001) if chr(code).isspace()]
+
+class DocumentIndex:
+    """Word ends and line breaks of a text, for O(log n) progress queries"""
+    
+    def __init__(self, text):
+        self.text = text
+        self.char_count = len(text)
+        if HAS_NUMPY:
+            self.word_ends, self.newlines = self._build_numpy(text)
+        else:
+            self.word_ends = array('q', (match.end()
+                                         for match in re.finditer(r'\S+', text)))
+            self.newlines = array('q', (match.start()
+                                        for match in re.finditer('\n', text)))
+        self.word_count = len(self.word_ends)
+        self.line_count = len(self.newlines) + 1
+    
+    @staticmethod
+    def _build_numpy(text):
+        codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+        if len(codes) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        
+        is_space = np.isin(codes, _WHITESPACE_CODES)
+        # A word ends where a non-space is followed by a space or the end of the text
+        word_ends = np.flatnonzero(~is_space[:-1] & is_space[1:]) + 1
+        if not is_space[-1]:
+            word_ends = np.append(word_ends, len(codes))
+        newlines = np.flatnonzero(codes == 10)
+        return word_ends, newlines
+    
+    def _count_before(self, offsets, position, inclusive=False):
+        """Number of offsets below position (or at it, when inclusive)"""
+        if HAS_NUMPY and isinstance(offsets, np.ndarray):
+            side = 'right' if inclusive else 'left'
+            return int(np.searchsorted(offsets, position, side=side))
+        return (bisect_right if inclusive else bisect_left)(offsets, position)
+    
+    def remaining_words(self, position):
+        """Words not yet completely typed at position"""
+        typed = self._count_before(self.word_ends, position, inclusive=True)
+        return self.word_count - typed
+    
+    def remaining_lines(self, position):
+        """Lines not yet completely typed at position"""
+        if position >= self.char_count:
+            return 0
+        return self.line_count - self._count_before(self.newlines, position)
+    
+    def line_number(self, position):
+        """1-based line containing position"""
+        return self._count_before(self.newlines, position) + 1
+    
+    def preview(self, position, before=20, after=80, width=100):
+        """Text around position with a ⚡ marker, newlines and tabs made visible"""
+        start = max(0, position - before)
+        head = self.text[start:position]
+        tail = self.text[position:position + after]
+        marker = "⚡" if 0 < position < self.char_count else ""
+        preview = (head + marker + tail).replace('\n', '↵').replace('\t', '→')
+        return f"{preview[:width]}{'...' if len(preview) > width else ''}"
+
+# Content-addressed document cache
+def content_hash(text):
+    """Stable hash of a text, used to recognise the same content across calls"""
+    data = text.encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def common_prefix_length(a, b, limit=None):
+    """Length of the common prefix of two strings, by bisecting slice comparisons"""
+    n = min(len(a), len(b), len(a) if limit is None else limit)
+    if a[:n] == b[:n]:
+        return n
+    
+    # Invariant: a[:low] == b[:low] and a[:high] != b[:high]; each comparison runs in C
+    low, high = 0, n
+    while high - low > 1:
+        middle = (low + high) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+class Document:
+    """Cleaned clipboard text with its statistics and any delay plans built for it"""
+    
+    def __init__(self, raw_text):
+        self.text = clean_clipboard_text_advanced(raw_text)
+        self.digest = content_hash(self.text)
+        self.original_length = len(raw_text)
+        self.char_count = len(self.text)
+        self.index = DocumentIndex(self.text)
+        self.word_count = self.index.word_count
+        self.line_count = self.index.line_count
+        self.plans = {}   # (base_wpm, seed) -> DelayPlan
+        self.keys = []    # Cache keys that point at this document
+    
+    def plan(self, base_wpm, seed=None):
+        """Delay plan for this text at base_wpm, loaded from PLAN_CACHE_DIR or built"""
+        seed = SESSION_SEED if seed is None else seed
+        plan = self.plans.get((base_wpm, seed))
+        if plan is None:
+            path = self.plan_path(base_wpm, seed)
+            if path and os.path.exists(path):
+                try:
+                    plan = load_delay_plan(path, self.text, self.digest)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[WARNING] ⚠️  Ignoring saved plan {path}: {e}")
+            if plan is None:
+                plan = start_delay_plan(self.text, base_wpm, seed)
+                if path:
+                    plan.when_complete(lambda: self._save_plan(plan, path))
+            self.plans[(base_wpm, seed)] = plan
+        return plan
+    
+    @staticmethod
+    def _save_plan(plan, path):
+        try:
+            os.makedirs(PLAN_CACHE_DIR, exist_ok=True)
+            plan.save(path)
+        except OSError as e:
+            print(f"[WARNING] ⚠️  Could not save plan: {e}")
+    
+    def plan_path(self, base_wpm, seed=None):
+        """File this text's plan is kept in under PLAN_CACHE_DIR; None when disabled"""
+        if not PLAN_CACHE_DIR:
+            return None
+        model = f"-{timing_model_digest[:8]}" if timing_model_digest else ''
+        seed = 'any' if seed is None else seed
+        name = f"{self.digest}-{base_wpm}-{seed}{model}.plan"
+        return os.path.join(PLAN_CACHE_DIR, name)
+    
+    def estimated_time(self, position, base_wpm):
+        """Seconds left from position: from a built plan, else from the word count"""
+        plan = self.plans.get((base_wpm, SESSION_SEED))
+        if plan is None:
+            return self.index.remaining_words(position) / base_wpm * 60
+        if WPM_CONTROL:
+            # Typing scales the plan to hold base_wpm, so estimate at that rate
+            return WpmController(base_wpm, len(plan)).estimated_time(plan, position)
+        return plan.remaining_time(position)
+    
+    @property
+    def nbytes(self):
+        index_bytes = sum(sys.getsizeof(offsets) if not HAS_NUMPY else offsets.nbytes
+                          for offsets in (self.index.word_ends, self.index.newlines))
+        return (sys.getsizeof(self.text) + index_bytes
+                + sum(plan.nbytes for plan in self.plans.values()))
+
+class DocumentCache:
+    """LRU cache of Documents keyed by a hash of the raw clipboard text"""
+    
+    def __init__(self, max_entries=DOCUMENT_CACHE_ENTRIES,
+                 max_bytes=DOCUMENT_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # digest -> Document, least recently used first
+        self._lock = threading.Lock()
+    
+    def get(self, raw_text):
+        """Return the Document for raw_text, cleaning and analysing it only on a miss"""
+        digest = content_hash(raw_text)
+        with self._lock:
+            document = self._entries.get(digest)
+            if document is not None:
+                self.hits += 1
+                self._touch(document)
+                self._enforce_limits()
+                return document
+        
+        # Clean outside the lock so status refreshes never wait on a large paste
+        document = Document(raw_text)
+        with self._lock:
+            self.misses += 1
+            # The cleaned text is cached too, so passing it back in is also a hit.
+            # Raw texts that clean alike stay separate entries: the first one cached
+            # keeps the cleaned key, so evicting either never drops the other.
+            for key in {digest, document.digest}:
+                if key == digest or key not in self._entries:
+                    self._entries[key] = document
+                    document.keys.append(key)
+            self._enforce_limits()
+        return document
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def _touch(self, document):
+        for key in document.keys:
+            self._entries.move_to_end(key)
+    
+    def _enforce_limits(self):
+        """Evict least recently used documents beyond the entry count or memory cap"""
+        while self._entries:
+            documents = {id(doc): doc for doc in self._entries.values()}
+            total_bytes = sum(doc.nbytes for doc in documents.values())
+            if len(documents) <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            if len(documents) == 1:
+                break  # Always keep the most recent document, however large
+            oldest = next(iter(self._entries.values()))
+            for key in oldest.keys:
+                if self._entries.get(key) is oldest:
+                    del self._entries[key]
+
+document_cache = DocumentCache()
+
+class CheckpointJournal:
+    """Append-only journal of typing positions, keyed by the hash of the cleaned text"""
+    
+    def __init__(self, path, every_keys=CHECKPOINT_EVERY_KEYS,
+                 interval=CHECKPOINT_INTERVAL,
+                 compact_records=CHECKPOINT_COMPACT_RECORDS):
+        self.path = path
+        self.every_keys = every_keys
+        self.interval = interval
+        self.compact_records = compact_records
+        self.positions = {}  # digest -> position
+        self.records = 0     # Records in the file, live or stale
+        self._file = None
+        self._lock = threading.Lock()
+        self._pending = None             # (digest, position) noted but not yet written
+        self._keys_since_write = 0
+        self._last_write = -math.inf
+        self._writes = None              # Writer thread's queue, made on first use
+        self._load()
+    
+    def _load(self):
+        """Replay the journal; a torn last line from a crash is skipped"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        digest, position = record['digest'], record['position']
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    self.records += 1
+                    if position:
+                        self.positions[digest] = position
+                    else:
+                        self.positions.pop(digest, None)
+        except FileNotFoundError:
+            pass
+    
+    def position(self, digest):
+        with self._lock:
+            return self.positions.get(digest, 0)
+    
+    def note(self, digest, position, now):
+        """Per keystroke; queues a save every every_keys keys or interval seconds"""
+        self._pending = (digest, position)
+        self._keys_since_write += 1
+        if (self._keys_since_write >= self.every_keys
+                or now - self._last_write >= self.interval):
+            self._last_write = now
+            self._keys_since_write = 0
+            self._pending = None
+            self.save_later(digest, position)
+    
+    def flush(self, sync=False):
+        """Write the last noted position and anything queued; sync forces it to disk"""
+        self.wait_written()
+        pending, self._pending = self._pending, None
+        self._keys_since_write = 0
+        if pending is not None:
+            self.save(*pending, sync=sync)
+        elif sync:
+            with self._lock:
+                if self._file is not None:
+                    os.fsync(self._file.fileno())
+    
+    def save_later(self, digest, position, sync=False):
+        """save() on the writer thread, so the typing thread never waits on the disk"""
+        self._pending = None
+        self._remember(digest, position)  # position() answers at once; the file lags
+        self._submit((digest, position, sync))
+    
+    def wait_written(self, timeout=10.0):
+        """Block until the writer thread has saved everything queued so far"""
+        if self._writes is None:
+            return True
+        written = threading.Event()
+        self._submit(written)
+        return written.wait(timeout)
+    
+    def _submit(self, item):
+        with self._lock:
+            if self._writes is None:
+                import queue
+                self._writes = queue.SimpleQueue()
+                threading.Thread(target=self._run_writer, name='autotyper-checkpoints',
+                                 daemon=True).start()
+        self._writes.put(item)
+    
+    def _run_writer(self):
+        while True:
+            item = self._writes.get()
+            if isinstance(item, threading.Event):
+                item.set()
+            else:
+                self._append(*item)
+    
+    def _remember(self, digest, position):
+        with self._lock:
+            if position:
+                self.positions[digest] = position
+            else:
+                self.positions.pop(digest, None)
+    
+    def save(self, digest, position, sync=False):
+        """Append one record; position 0 clears the digest"""
+        self._remember(digest, position)
+        self._append(digest, position, sync)
+    
+    def _append(self, digest, position, sync):
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                record = {'digest': digest, 'position': position}
+                self._file.write(json.dumps(record) + '\n')
+                self._file.flush()  # In the OS once written; a process crash keeps it
+                if sync:
+                    os.fsync(self._file.fileno())
+                self.records += 1
+            except OSError as e:
+                print(f"[WARNING] ⚠️  Could not write checkpoint: {e}")
+                return
+            if self.records - len(self.positions) >= self.compact_records:
+                self._compact()
+    
+    def clear(self, digest=None):
+        """Forget one text's checkpoint, or all of them"""
+        self._pending = None
+        self.wait_written()
+        if digest is not None:
+            self.save(digest, 0, sync=True)
+            return
+        with self._lock:
+            self.positions.clear()
+            self._compact()
+    
+    def _compact(self):
+        """Rewrite the journal with one record per live checkpoint"""
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for digest, position in self.positions.items():
+                    f.write(json.dumps({'digest': digest, 'position': position}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            os.replace(temp_path, self.path)
+            self.records = len(self.positions)
+        except OSError as e:
+            print(f"[WARNING] ⚠️  Could not compact checkpoints: {e}")
+    
+    def close(self):
+        self.flush(sync=True)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+_checkpoint_journal = None
+
+def get_checkpoint_journal():
+    """Shared checkpoint journal, opened on first use; None when disabled"""
+    global _checkpoint_journal
+    if _checkpoint_journal is None and CHECKPOINT_PATH:
+        _checkpoint_journal = CheckpointJournal(CHECKPOINT_PATH)
+    return _checkpoint_journal
+
+# Keystroke output backends
+class OutputBackend:
+    """Interface the typing engine uses to send keystrokes"""
+    name = 'base'
+    
+    def write(self, text):
+        """Type literal characters"""
+        raise NotImplementedError
+    
+    def press(self, key):
+        """Press a named key such as 'enter', 'tab' or 'backspace'"""
+        raise NotImplementedError
+    
+    def type_char(self, char):
+        """Type a single character, mapping newlines and tabs to key presses"""
+        if char == '\n':
+            self.press('enter')
+        elif char == '\t':
+            self.press('tab')
+        else:
+            self.write(char)
+    
+    def write_timed(self, text, gaps):
+        """Type a run of characters in one call, gaps[n] seconds after character n"""
+        deadline = time.perf_counter()
+        for n, char in enumerate(text):
+            if n:
+                deadline += gaps[n - 1]
+                remaining = deadline - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+            self.type_char(char)
+    
+    def close(self):
+        """Release any resources held by the backend"""
+        pass
+
+class PyAutoGUIBackend(OutputBackend):
+    """pyautogui output with its hidden per-call PAUSE turned off"""
+    name = 'pyautogui'
+    
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+    
+    def write(self, text):
+        # _pause=False skips the pyautogui.PAUSE sleep (0.1s by default) after each call
+        self._pyautogui.write(text, _pause=False)
+    
+    def press(self, key):
+        self._pyautogui.press(key, _pause=False)
+    
+    def write_timed(self, text, gaps):
+        # pyautogui sleeps a fixed interval after every character, the last one included
+        self._pyautogui.write(text, interval=sum(gaps) / len(text), _pause=False)
+
+class X11Backend(OutputBackend):
+    """Direct XTest output through python-xlib (pip install python-xlib)"""
+    name = 'x11'
+    
+    KEY_NAMES = {
+        'enter': 'Return',
+        'tab': 'Tab',
+        'backspace': 'BackSpace',
+        'space': 'space',
+        'esc': 'Escape',
+    }
+    
+    def __init__(self, display_name=None):
+        from Xlib import X, XK, display
+        from Xlib.ext import xtest
+        
+        self._X = X
+        self._XK = XK
+        self._xtest = xtest
+        self._display = display.Display(display_name)
+        self._shift = self._display.keysym_to_keycode(XK.string_to_keysym('Shift_L'))
+        self._keycodes = {}
+    
+    def _lookup(self, keysym):
+        """Map a keysym to (keycode, needs_shift), cached per keysym"""
+        entry = self._keycodes.get(keysym)
+        if entry is None:
+            keycode = self._display.keysym_to_keycode(keysym)
+            needs_shift = bool(keycode) and (
+                self._display.keycode_to_keysym(keycode, 0) != keysym)
+            entry = self._keycodes[keysym] = (keycode, needs_shift)
+        return entry
+    
+    def _tap(self, keysym, delay_ms=0):
+        keycode, needs_shift = self._lookup(keysym)
+        if not keycode:
+            return  # No key produces this symbol on the current layout
+        
+        # A delay makes the X server wait that long after the previous event
+        fake_input = self._xtest.fake_input
+        when = delay_ms or self._X.CurrentTime
+        if needs_shift:
+            fake_input(self._display, self._X.KeyPress, self._shift, when)
+            when = self._X.CurrentTime
+        fake_input(self._display, self._X.KeyPress, keycode, when)
+        fake_input(self._display, self._X.KeyRelease, keycode)
+        if needs_shift:
+            fake_input(self._display, self._X.KeyRelease, self._shift)
+    
+    def _keysym(self, char):
+        if char == '\n':
+            return self._XK.string_to_keysym('Return')
+        if char == '\t':
+            return self._XK.string_to_keysym('Tab')
+        code = ord(char)
+        # Latin-1 keysyms equal their code point, the rest use the Unicode keysym range
+        if 0x20 <= code <= 0x7e or 0xa0 <= code <= 0xff:
+            return code
+        return 0x01000000 | code
+    
+    def write(self, text):
+        for char in text:
+            self._tap(self._keysym(char))
+        self._display.flush()
+    
+    def write_timed(self, text, gaps):
+        # The server times the batch: every key carries its delay in whole milliseconds,
+        # rounded on the running total so the error never accumulates
+        elapsed = sent = 0
+        for n, char in enumerate(text):
+            if n:
+                elapsed += gaps[n - 1] * 1000
+            delay = round(elapsed) - sent
+            sent += delay
+            self._tap(self._keysym(char), delay)
+        self._display.flush()
+    
+    def press(self, key):
+        self._tap(self._XK.string_to_keysym(self.KEY_NAMES.get(key, key)))
+        self._display.flush()
+    
+    def close(self):
+        self._display.close()
+
+class RecordingBackend(OutputBackend):
+    """In-memory backend that records every keystroke instead of sending it"""
+    name = 'recording'
+    
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.events = []  # (timestamp, 'write' or 'press', text or key name)
+    
+    def write(self, text):
+        self.events.append((self.clock(), 'write', text))
+    
+    def press(self, key):
+        self.events.append((self.clock(), 'press', key))
+    
+    def write_timed(self, text, gaps):
+        # Nothing waits here, so each key is stamped with the time it is planned for
+        at = self.clock()
+        for n, char in enumerate(text):
+            if n:
+                at += gaps[n - 1]
+            if char in '\n\t':
+                self.events.append((at, 'press', 'enter' if char == '\n' else 'tab'))
+            else:
+                self.events.append((at, 'write', char))
+    
+    @property
+    def text(self):
+        """Text an editor would show after replaying the recorded keystrokes"""
+        typed = []
+        for _, kind, value in self.events:
+            if kind == 'write':
+                typed.extend(value)
+            elif value == 'backspace':
+                if typed:
+                    typed.pop()
+            elif value == 'enter':
+                typed.append('\n')
+            elif value == 'tab':
+                typed.append('\t')
+        return ''.join(typed)
+
+class NullBackend(OutputBackend):
+    """Backend that discards keystrokes and only counts them (dry runs, benchmarks)"""
+    name = 'null'
+    
+    def __init__(self):
+        self.keystrokes = 0
+    
+    def write(self, text):
+        self.keystrokes += len(text)
+    
+    def press(self, key):
+        self.keystrokes += 1
+    
+    def write_timed(self, text, gaps):
+        self.keystrokes += len(text)
+
+OUTPUT_BACKENDS = {
+    backend.name: backend
+    for backend in (PyAutoGUIBackend, X11Backend, RecordingBackend, NullBackend)
+}
+
+output_backend = None
+
+def create_output_backend(name=None):
+    """Create an output backend by name, falling back to pyautogui"""
+    name = name or OUTPUT_BACKEND
+    backend_class = OUTPUT_BACKENDS.get(name)
+    if backend_class is None:
+        print(f"[WARNING] ⚠️  Unknown output backend '{name}', using pyautogui")
+        return PyAutoGUIBackend()
+    
+    try:
+        return backend_class()
+    except Exception as e:
+        if backend_class is PyAutoGUIBackend:
+            raise
+        print(f"[WARNING] ⚠️  Output backend '{name}' unavailable ({e}), "
+              f"using pyautogui")
+        return PyAutoGUIBackend()
+
+def get_output_backend():
+    """Return the shared output backend, creating it on first use"""
+    global output_backend
+    if output_backend is None:
+        output_backend = create_output_backend()
+    return output_backend
+
+# Keystroke timing telemetry
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations with about 3% relative error"""
+    
+    SUB_BITS = 6           # 64 linear sub-buckets per power of two
+    MAX_MICROSECONDS = 2 ** 26  # About 67 seconds; longer values land in the top bucket
+    
+    def __init__(self):
+        top = self._bucket(self.MAX_MICROSECONDS)
+        self.counts = array('Q', [0]) * (top + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    @classmethod
+    def _bucket(cls, microseconds):
+        shift = max(0, microseconds.bit_length() - cls.SUB_BITS)
+        return (shift << cls.SUB_BITS) + (microseconds >> shift)
+    
+    @classmethod
+    def _bucket_midpoint(cls, bucket):
+        shift = bucket >> cls.SUB_BITS
+        low = (bucket & ((1 << cls.SUB_BITS) - 1)) << shift
+        return (low + ((1 << shift) - 1) / 2) / 1e6
+    
+    def record(self, seconds):
+        if seconds < 0.0:
+            seconds = 0.0
+        microseconds = int(seconds * 1e6)
+        if microseconds > self.MAX_MICROSECONDS:
+            microseconds = self.MAX_MICROSECONDS
+        shift = microseconds.bit_length() - self.SUB_BITS
+        if shift < 0:
+            shift = 0
+        self.counts[(shift << self.SUB_BITS) + (microseconds >> shift)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def record_many(self, values):
+        """Record a buffer of durations at once, vectorized when NumPy is available"""
+        if not HAS_NUMPY:
+            for seconds in values:
+                self.record(seconds)
+            return
+        
+        seconds = np.maximum(np.frombuffer(values, dtype=np.float64), 0.0)
+        if not len(seconds):
+            return
+        microseconds = np.minimum(seconds * 1e6, self.MAX_MICROSECONDS).astype(np.int64)
+        shift = np.maximum(np.frexp(microseconds)[1] - self.SUB_BITS, 0)
+        buckets = (shift << self.SUB_BITS) + (microseconds >> shift)
+        np.frombuffer(self.counts, dtype=np.uint64)[:] += np.bincount(
+            buckets, minlength=len(self.counts)).astype(np.uint64)
+        self.count += len(seconds)
+        self.total += float(seconds.sum())
+        self.min = min(self.min, float(seconds.min()))
+        self.max = max(self.max, float(seconds.max()))
+    
+    def percentile(self, percent):
+        """Approximate value below which percent of the recorded durations fall"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for bucket, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(max(self._bucket_midpoint(bucket), self.min), self.max)
+        return self.max
+    
+    def summary(self):
+        """Count, mean, extremes and p50/p95/p99 in seconds"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+class KeystrokeTelemetry:
+    """Per-keystroke timings in preallocated ring buffers, plus a histogram per field"""
+    
+    FIELDS = ('planned_delay', 'interval', 'output_latency', 'lateness')
+    
+    def __init__(self, capacity=TELEMETRY_CAPACITY):
+        self.capacity = capacity
+        self.count = 0
+        self.positions = array('q', [0]) * capacity
+        self.columns = {field: array('d', [0.0]) * capacity for field in self.FIELDS}
+        self.histograms = {field: LatencyHistogram() for field in self.FIELDS}
+        self._ingested = 0  # Keys already folded into the histograms
+        self._ingest_lock = threading.Lock()  # Metrics are read while keys are recorded
+        # Direct references keep record() free of dictionary lookups
+        self._planned, self._intervals, self._latencies, self._lateness = (
+            self.columns[field] for field in self.FIELDS)
+    
+    def record(self, position, planned_delay, interval, output_latency, lateness):
+        """Store one keystroke; the buffers keep the most recent capacity keys"""
+        slot = self.count % self.capacity
+        self.positions[slot] = position
+        self._planned[slot] = planned_delay
+        self._intervals[slot] = interval
+        self._latencies[slot] = output_latency
+        self._lateness[slot] = lateness
+        self.count += 1
+        
+        # Fold the buffer into the histograms in one batch before it wraps
+        if slot == self.capacity - 1:
+            self._ingest()
+    
+    def _ingest(self):
+        with self._ingest_lock:
+            pending = self.count - self._ingested
+            if not pending:
+                return
+            start = self._ingested % self.capacity
+            for field in self.FIELDS:
+                values = self.columns[field][start:start + pending]
+                self.histograms[field].record_many(values)
+            self._ingested += pending
     
-    # Ensure minimum delay
-    return max(0.008, delay)
+    def percentile(self, field, percent):
+        self._ingest()
+        return self.histograms[field].percentile(percent)
+    
+    def rows(self):
+        """Buffered keystrokes, oldest first, as (position, *FIELDS) tuples"""
+        kept = min(self.count, self.capacity)
+        first = self.count - kept
+        for n in range(first, self.count):
+            slot = n % self.capacity
+            yield (self.positions[slot],) + tuple(self.columns[field][slot]
+                                                  for field in self.FIELDS)
+    
+    def summary(self):
+        self._ingest()
+        return {field: histogram.summary()
+                for field, histogram in self.histograms.items()}
+    
+    def print_summary(self, out=print):
+        summary = self.summary()
+        for field in ('interval', 'output_latency', 'lateness'):
+            stats = summary[field]
+            out(f"[STATS] 📈 {field}: p50 {stats['p50'] * 1000:.2f}ms | "
+                f"p95 {stats['p95'] * 1000:.2f}ms | "
+                f"p99 {stats['p99'] * 1000:.2f}ms | "
+                f"max {stats['max'] * 1000:.2f}ms")
+    
+    def export(self, path):
+        """Write the buffered keystrokes as CSV, or summary and keys as JSON (.json)"""
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.json'):
+                keys = [dict(zip(('position',) + self.FIELDS, row))
+                        for row in self.rows()]
+                json.dump({'keystrokes': self.count, 'summary': self.summary(),
+                           'keys': keys}, f, indent=1)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(('position',) + self.FIELDS)
+                writer.writerows(self.rows())
 
-def clean_clipboard_text_advanced(text):
-    """Enhanced text cleaning with better whitespace handling"""
-    if not text:
-        return text
+TIMER_MODES = ('sleep', 'yield', 'spin', 'nanosleep', 'timerfd')
+_timer_margin = None  # Calibrated TIMER_SPIN_MARGIN, measured once per process
+
+def calibrate_timer(samples=40, probe=0.002):
+    """Precise-finish margin: a coarse 2ms wait's 95th percentile overshoot, padded"""
+    global _timer_margin
+    if _timer_margin is None:
+        event = threading.Event()  # Timed waits, as in SessionController.sleep
+        overshoots = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            event.wait(probe)
+            overshoots.append(time.perf_counter() - start - probe)
+        overshoots.sort()
+        margin = overshoots[int(samples * 0.95)] * 1.25
+        _timer_margin = min(max(margin, 0.0002), TIMER_MAX_MARGIN)
+    return _timer_margin
+
+class PrecisionTimer:
+    """Sleep that wakes on time: a coarse, interruptible sleep, then a precise finish"""
     
-    # Split into lines for processing
-    lines = text.split('\n')
-    cleaned_lines = []
+    def __init__(self, coarse_sleep=time.sleep, mode=None, margin=None,
+                 clock=time.perf_counter):
+        self.coarse_sleep = coarse_sleep
+        self.clock = clock
+        self.mode = self._available(mode or TIMER_MODE)
+        if self.mode == 'sleep':
+            self.margin = 0.0
+        elif margin is not None:
+            self.margin = margin
+        elif TIMER_SPIN_MARGIN is not None:
+            self.margin = TIMER_SPIN_MARGIN
+        else:
+            self.margin = calibrate_timer()
+        self.overshoot = LatencyHistogram()  # How late each sleep woke
+        self.finish_time = 0.0               # Seconds spent in the precise finish
+        self._finish = getattr(self, f'_finish_{self.mode}')
+        self._timerfd = None
+        self._libc = None
     
-    for line in lines:
-        # Remove trailing whitespace from each line
-        cleaned_line = line.rstrip()
-        
-        # Replace multiple consecutive spaces with single space (preserve intentional formatting)
-        cleaned_line = re.sub(r' {2,}', ' ', cleaned_line)
-        
-        # Remove leading whitespace but preserve indentation (tabs/4+ spaces)
-        if cleaned_line.startswith('\t') or cleaned_line.startswith('    '):
-            # Preserve intentional indentation
+    @staticmethod
+    def _available(mode):
+        """mode, or 'yield' where the platform lacks it"""
+        if mode not in TIMER_MODES:
+            raise ValueError(f"unknown timer mode {mode!r}")
+        if (mode == 'timerfd' and not hasattr(os, 'timerfd_create')) or \
+                (mode == 'nanosleep' and not sys.platform.startswith('linux')):
+            print(f"[WARNING] ⚠️  Timer mode {mode!r} isn't available here, "
+                  f"using 'yield'")
+            return 'yield'
+        return mode
+    
+    def __call__(self, seconds):
+        """Sleep seconds; returns False early, skipping the finish, if interrupted"""
+        deadline = self.clock() + seconds
+        coarse = seconds - self.margin
+        if coarse > 0 and self.coarse_sleep(coarse) is False:
+            return False  # Paused or stopped
+        start = self.clock()
+        if start < deadline:
+            self._finish(deadline)
+        now = self.clock()
+        self.finish_time += now - start
+        self.overshoot.record(now - deadline)
+        return True
+    
+    def _finish_sleep(self, deadline):
+        time.sleep(max(deadline - self.clock(), 0))
+    
+    def _finish_spin(self, deadline):
+        clock = self.clock
+        while clock() < deadline:
             pass
-        else:
-            cleaned_line = cleaned_line.lstrip()
-        
-        cleaned_lines.append(cleaned_line)
     
-    # Join lines back together
-    cleaned_text = '\n'.join(cleaned_lines)
+    def _finish_yield(self, deadline):
+        clock = self.clock
+        while clock() < deadline:
+            time.sleep(0)  # Yields the CPU and the GIL to other threads
     
-    # Remove excessive empty lines (more than 2 consecutive)
-    cleaned_text = re.sub(r'\n{3,}', '\n\n', cleaned_text)
+    def _finish_nanosleep(self, deadline):
+        # Absolute CLOCK_MONOTONIC deadline, so the call itself can't add drift
+        import ctypes
+        if self._libc is None:
+            import ctypes.util
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        target = time.clock_gettime(time.CLOCK_MONOTONIC) + (deadline - self.clock())
+        # struct timespec, and flag 1 is TIMER_ABSTIME
+        spec = (ctypes.c_long * 2)(int(target), int(target % 1 * 1e9))
+        self._libc.clock_nanosleep(time.CLOCK_MONOTONIC, 1, spec, None)
     
-    # Strip leading and trailing whitespace from entire text
-    cleaned_text = cleaned_text.strip()
+    def _finish_timerfd(self, deadline):
+        if self._timerfd is None:
+            self._timerfd = os.timerfd_create(time.CLOCK_MONOTONIC)
+        target = time.clock_gettime(time.CLOCK_MONOTONIC) + (deadline - self.clock())
+        os.timerfd_settime(self._timerfd, flags=os.TFD_TIMER_ABSTIME, initial=target)
+        os.read(self._timerfd, 8)  # Blocks until the timer expires
     
-    return cleaned_text
+    def close(self):
+        if self._timerfd is not None:
+            os.close(self._timerfd)
+            self._timerfd = None
+    
+    def print_summary(self, out=print):
+        stats = self.overshoot.summary()
+        if stats['count']:
+            out(f"[STATS] ⏲️  Timer ({self.mode}, finish {self.margin * 1000:.2f}ms): "
+                f"overshoot p50 {stats['p50'] * 1e6:.0f}µs | "
+                f"p99 {stats['p99'] * 1e6:.0f}µs | max {stats['max'] * 1e6:.0f}µs | "
+                f"finishing {self.finish_time:.2f}s")
 
-def calculate_char_delay_enhanced(base_wpm, char, position, total_chars, flow_state='steady', prev_char=None):
-    """Enhanced delay calculation with Gaussian distribution and better human factors"""
+class DeadlineScheduler:
+    """Absolute keystroke deadlines on a monotonic clock, so overhead never drifts"""
     
-    # Apply fatigue (gradual slowdown)
-    fatigue_multiplier = 1 + (FATIGUE_FACTOR * position / total_chars)
-    current_wpm = base_wpm / fatigue_multiplier
+    def __init__(self, clock=time.perf_counter, sleep=time.sleep,
+                 max_lag=MAX_SCHEDULE_LAG):
+        self.clock = clock
+        self.sleep = sleep
+        self.max_lag = max_lag
+        self.deadline = None
+        self.lateness = 0.0  # Lateness of the most recent key
+        self.rebases = 0     # Times the schedule restarted after a pause or stall
+        self.keys = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
     
-    # Use Gaussian distribution for more natural variation
-    base_delay = human_delay_gaussian(current_wpm, WPM_VARIATION)
+    def start(self):
+        """Schedule the first keystroke for right now"""
+        self.deadline = self.clock()
     
-    # Flow state modifiers
-    flow_modifiers = {
-        'steady': 1.0,      # Normal typing
-        'rushed': 0.65,     # Typing quickly (improved from 0.7)
-        'careful': 1.5,     # Deliberate typing (improved from 1.4)
-        'thinking': 2.0     # Thoughtful typing (improved from 1.8)
-    }
-    flow_modifier = flow_modifiers.get(flow_state, 1.0)
+    def rebase(self):
+        """Restart the schedule from now, e.g. after a pause"""
+        self.deadline = self.clock()
+        self.rebases += 1
     
-    # Enhanced character-specific modifiers
-    char_modifier = 1.0
+    def advance(self, delay):
+        """Move the deadline forward by a planned or per-character delay"""
+        self.deadline += delay
     
-    if char in '.!?':
-        char_modifier = random.uniform(2.5, 4.0)  # Sentence endings
-    elif char in ',;:':
-        char_modifier = random.uniform(1.4, 2.5)  # Punctuation
-    elif char == ' ':
-        # Context-aware space timing
-        if prev_char and prev_char in '.!?':
-            char_modifier = random.uniform(0.3, 0.6)  # Quick space after sentence
-        elif prev_char and prev_char in ',;:':
-            char_modifier = random.uniform(0.5, 0.8)  # Medium space after punctuation
-        else:
-            char_modifier = random.uniform(0.7, 1.1)  # Normal word spacing
-    elif char.isupper() and prev_char and prev_char.islower():
-        char_modifier = random.uniform(1.1, 1.4)  # Caps transition
-    elif char.isdigit():
-        char_modifier = random.uniform(1.2, 1.6)  # Numbers
-    elif char in '()[]{}':
-        char_modifier = random.uniform(1.3, 1.8)  # Brackets
-    elif char in '"\'':
-        char_modifier = random.uniform(1.0, 1.3)  # Quotes
-    elif char in '!@#$%^&*+=<>?':
-        char_modifier = random.uniform(1.4, 2.0)  # Special symbols
-    elif char == '\n':
-        char_modifier = random.uniform(1.5, 2.5)  # New lines
-    elif char == '\t':
-        char_modifier = random.uniform(1.0, 1.5)  # Tabs
-    
-    # Common letter combinations (enhanced)
-    if prev_char:
-        common_bigrams = [
-            'th', 'he', 'in', 'er', 'an', 're', 'ed', 'nd', 'on', 'en', 
-            'at', 'ou', 'it', 'is', 'or', 'ti', 'hi', 'st', 'io', 'le', 
-            'ea', 'ng', 'ar', 've', 'te', 'co', 'to', 'al', 'de', 'se'
-        ]
-        bigram = (prev_char + char).lower()
-        if bigram in common_bigrams:
-            char_modifier *= random.uniform(0.6, 0.8)  # Faster for common patterns
+    def wait(self):
+        """Sleep until the current deadline and return how late the key is"""
+        remaining = self.deadline - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
         
-        # Difficult combinations
-        difficult_bigrams = ['qu', 'x', 'z', 'qw', 'xz', 'jp', 'fj']
-        if bigram in difficult_bigrams or char in 'qxz':
-            char_modifier *= random.uniform(1.2, 1.5)
+        lateness = self.lateness = self.clock() - self.deadline
+        self.keys += 1
+        if lateness > 0:
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+        
+        # Drop schedule debt after a long stall instead of bursting to catch up
+        if lateness > self.max_lag:
+            self.rebase()
+        return lateness
     
-    # Enhanced typing patterns with Gaussian influence
-    pattern_roll = random.random()
-    if pattern_roll < BURST_CHANCE:
-        char_modifier *= random.uniform(0.2, 0.5)  # Fast burst
-    elif pattern_roll < BURST_CHANCE + HESITATION_CHANCE:
-        char_modifier *= random.uniform(2.0, 3.5)  # Hesitation
-    elif pattern_roll < BURST_CHANCE + HESITATION_CHANCE + MICRO_PAUSE_CHANCE:
-        char_modifier *= random.uniform(1.2, 1.8)  # Micro-pause
+    @property
+    def mean_lateness(self):
+        return self.total_lateness / self.keys if self.keys else 0.0
+
+class WpmController:
+    """PI controller scaling planned delays until the measured rate is base_wpm"""
     
-    # Apply all modifiers
-    final_delay = base_delay * char_modifier * flow_modifier
+    def __init__(self, base_wpm, total_chars, window=None, gains=None, limits=None,
+                 hold_through_fatigue=None):
+        self.target = 12.0 / base_wpm  # Seconds per character, 5 characters a word
+        self.total_chars = max(total_chars, 1)
+        self.window = window or WPM_CONTROL_WINDOW
+        self.kp, self.ki = gains or WPM_CONTROL_GAINS
+        self.limits = limits or WPM_CONTROL_LIMITS
+        if hold_through_fatigue is None:
+            hold_through_fatigue = WPM_HOLD_THROUGH_FATIGUE
+        self.fatigue = 0.0 if hold_through_fatigue else FATIGUE_FACTOR
+        self.scale = 1.0          # Multiplier for upcoming planned delays
+        self.base_scale = 1.0     # Feed-forward part, from the plan's own mean delay
+        self.behind = 0.0         # Integral term: seconds behind the target schedule
+        self._samples = deque(maxlen=self.window + 1)  # (time, position) of recent keys
+        self._rebases = 0
     
-    # Add small jitter
-    jitter = random.uniform(-0.01, 0.01)
-    final_delay = max(0.005, final_delay + jitter)
+    def target_interval(self, position):
+        """Seconds per character allowed at position, with fatigue unless held"""
+        return self.target * (1 + self.fatigue * position / self.total_chars)
     
-    return final_delay
+    def prime(self, plan, position):
+        """Start from the scale that makes the remaining plan take the target time"""
+        remaining = self.total_chars - position
+        planned = plan.remaining_time(position)
+        if remaining > 0 and planned > 0:
+            middle = (position + self.total_chars) / 2
+            self.base_scale = remaining * self.target_interval(middle) / planned
+            self.scale = min(max(self.base_scale, self.limits[0]), self.limits[1])
+    
+    def estimated_time(self, plan, position):
+        """Seconds the rest of plan takes once its delays are scaled to the target"""
+        self.prime(plan, position)
+        return plan.remaining_time(position) * self.scale
+    
+    def update(self, now, position, scheduler):
+        """Record a keystroke and return the delay scale for the next one"""
+        samples = self._samples
+        if scheduler.rebases != self._rebases:
+            samples.clear()  # A pause or stall isn't typing speed
+            self._rebases = scheduler.rebases
+        target = self.target_interval(position)
+        if samples:
+            last_time, last_position = samples[-1]
+            self.behind += (now - last_time) - (position - last_position) * target
+        samples.append((now, position))
+        
+        # Proportional: log rate error over the window; integral: time lost or gained
+        error = 0.0
+        then, start = samples[0]
+        if len(samples) > self.window and now > then and position > start:
+            error = math.log(target * (position - start) / (now - then))
+        low, high = self.limits
+        if self.ki:
+            bound = math.log(high / low) * target * self.window / self.ki
+            self.behind = min(max(self.behind, -bound), bound)  # No wind-up past limits
+        integral = -self.behind / (target * self.window)
+        scale = self.base_scale * math.exp(self.kp * error + self.ki * integral)
+        self.scale = min(max(scale, low), high)
+        return self.scale
+
+class ProgressReporter:
+    """Writes typing output on a thread of its own; the typing thread only queues it"""
+    
+    def __init__(self, interval=None, json_path=None):
+        self.interval = PROGRESS_INTERVAL if interval is None else interval
+        self.json_path = PROGRESS_JSON_PATH if json_path is None else json_path
+        # Kept, so events still reach the real stdout once it is redirected
+        self._json_stream = sys.stdout if self.json_path == '-' else None
+        self._queue = None
+        self._lock = threading.Lock()
+        self._json_file = None
+        self._failed = False
+    
+    def log(self, message, event='log', **fields):
+        """Queue a console line; event and fields are its JSON-lines record"""
+        self._put((event, time.time(), message, fields))
+    
+    def progress(self, position, total, wpm, flow):
+        """Queue a progress update; formatted on the reporter thread"""
+        self._put(('progress', time.time(), None,
+                   {'position': position, 'total': total, 'wpm': round(wpm, 1),
+                    'flow': flow}))
+    
+    def defer(self, callback):
+        """Run callback on the reporter thread, in order with the queued output"""
+        self._put(('call', 0.0, callback, None))
+    
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far has been written"""
+        written = threading.Event()
+        self._put(('flush', 0.0, written, None))
+        return written.wait(timeout)
+    
+    def _put(self, item):
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    import queue
+                    self._queue = queue.SimpleQueue()
+                    threading.Thread(target=self._run, name='autotyper-reporter',
+                                     daemon=True).start()
+        self._queue.put(item)
+    
+    def _run(self):
+        while True:
+            event, when, message, fields = self._queue.get()
+            if event == 'flush':
+                message.set()
+                continue
+            if event == 'call':
+                try:
+                    message()
+                except Exception as e:
+                    print(f"[WARNING] ⚠️  Deferred output failed: {e}", file=sys.stderr)
+                continue
+            if event == 'progress':
+                percent = fields['position'] / fields['total'] * 100
+                message = (f"[PROGRESS] {percent:.1f}% | "
+                           f"WPM: {fields['wpm']:.1f} | Flow: {fields['flow']}")
+            try:
+                if self.json_path != '-':
+                    print(message, flush=True)
+                if self.json_path:
+                    self._write_json(dict(event=event, time=round(when, 3),
+                                          message=message.strip(), **fields))
+            except Exception as e:
+                if not self._failed:  # Once, rather than for every line after
+                    self._failed = True
+                    print(f"[WARNING] ⚠️  Progress output failed: {e}", file=sys.stderr)
+    
+    def _write_json(self, record):
+        if self._json_stream is not None:
+            self._json_stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._json_stream.flush()
+            return
+        if self._json_file is None:
+            self._json_file = open(self.json_path, 'a', encoding='utf-8')
+        self._json_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._json_file.flush()
+
+progress_reporter = None
 
-def human_type_enhanced(text, base_wpm=DEFAULT_BASE_WPM):
-    """Enhanced typing with position tracking and resume capability"""
-    global typing_state, typing_position
+def get_progress_reporter():
+    """Shared progress reporter, created on first use"""
+    global progress_reporter
+    if progress_reporter is None:
+        progress_reporter = ProgressReporter()
+    return progress_reporter
+
+def human_type_enhanced(text, base_wpm=DEFAULT_BASE_WPM, backend=None, scheduler=None,
+                        controller=None, journal=None, reporter=None):
+    """Enhanced typing with position tracking and resume; True once completed"""
     
+    reporter = reporter or get_progress_reporter()
     if not text:
-        print("[WARNING] No text to type!")
-        return
+        reporter.log("[WARNING] No text to type!", event='warning')
+        return False
+    
+    backend = backend or get_output_backend()
+    controller = controller or session
     
-    # Clean the text before typing
+    # Clean the text before typing (cached, so already-cleaned text is a lookup)
     original_length = len(text)
-    text = clean_clipboard_text_advanced(text)
+    document = document_cache.get(text)
+    text = document.text
     cleaned_length = len(text)
     
     if original_length != cleaned_length:
-        print(f"[INFO] 🧹 Advanced cleaning: {original_length} → {cleaned_length} characters")
+        reporter.log(f"[INFO] 🧹 Advanced cleaning: {original_length} → "
+                     f"{cleaned_length} characters")
+    
+    reporter.log(f"[INFO] 🚀 Enhanced typing: {len(text)} characters "
+                 f"from position {controller.position}",
+                 event='start', chars=len(text), position=controller.position,
+                 wpm=base_wpm)
+    reporter.log(f"[INFO] ⚡ Target WPM: {base_wpm} (Gaussian distribution)")
+    reporter.log(f"[INFO] 🎮 Controls: F8=Pause | F9=Resume/Start | F10=Stop")
+    
+    # Plan every delay up front so the loop below only indexes into it
+    plan = document.plan(base_wpm)
+    reporter.log(f"[INFO] 🎲 Seed: {plan.seed} "
+                 f"(set SESSION_SEED to replay this session)", seed=plan.seed)
     
-    print(f"[INFO] 🚀 Enhanced typing: {len(text)} characters from position {typing_position}")
-    print(f"[INFO] ⚡ Target WPM: {base_wpm} (Gaussian distribution)")
-    print(f"[INFO] 🎮 Controls: F8=Pause | F9=Resume/Start | F10=Stop")
+    # Typos are part of the plan too, so a replay from the same position repeats them
+    typos = plan.typos
+    next_typo = TypoCursor(typos, controller.position)
+    ready = plan.ready  # Large plans are still being filled in behind the typing
     
-    start_time = time.time()
+    scheduler = scheduler or DeadlineScheduler(sleep=PrecisionTimer(controller.sleep))
+    telemetry = KeystrokeTelemetry() if TELEMETRY_ENABLED else None
+    controller.telemetry = telemetry
+    last_deadline = last_emit = None
     chars_typed = 0
-    current_flow_state = get_typing_flow_state()
-    flow_change_counter = 0
-    prev_char = None
     
-    print(f"[INFO] 🌊 Flow state: '{current_flow_state}'")
+    # Feedback on the achieved rate absorbs backend latency, typo time and the delay
+    # modifiers
+    wpm_control = WpmController(base_wpm, len(text)) if WPM_CONTROL else None
+    scale = 1.0
+    if wpm_control is not None:
+        wpm_control.prime(plan, controller.position)
+        scale = wpm_control.scale
+    
+    if controller.position < len(plan):
+        reporter.log(f"[INFO] 🌊 Flow state: '{plan.flow_state(controller.position)}'")
+    
+    scheduler.start()
+    start_time = scheduler.deadline
+    next_progress = start_time + reporter.interval
     
     # Start from current position
-    for i in range(typing_position, len(text)):
-        # Thread safety for position tracking
-        with typing_lock:
-            if typing_state == TYPING_STOPPED:
-                print(f"\n[INFO] 🛑 Typing stopped at position {i}")
-                break
-            typing_position = i
-        
-        # Check for pause
-        while typing_state == TYPING_PAUSED:
-            time.sleep(0.1)
-            
+    completed = False
+    batch_threshold = KEY_BATCH_THRESHOLD
+    batched_until = 0  # Characters before this index went out in an earlier batch
+    for i in range(controller.position, len(text)):
+        if i < batched_until:
+            continue
         char = text[i]
+        if i >= ready:
+            ready = _await_plan(plan, i, controller)
+            if ready <= i:
+                break
+            if next_typo.position < i:
+                next_typo.seek(i)  # Typos of chunks planned while waiting
         
-        # Change typing flow state occasionally
-        flow_change_counter += 1
-        if flow_change_counter > random.randint(12, 35):
-            current_flow_state = get_typing_flow_state()
-            flow_change_counter = 0
+        # Planned typo before this character, scheduled like any other keystroke
+        if i == next_typo.position:
+            actions = typos.actions(next_typo.event)
+            if not _send_typo(actions, backend, scheduler, controller):
+                break
+            next_typo.advance()
         
         # Handle special characters
-        if char == '\n':
-            pyautogui.press('enter')
-        elif char == '\t':
-            pyautogui.press('tab')
-        elif char == '\r':
+        if char == '\r':
+            controller.mark_emitted(i)
             continue
+        
+        # Keys planned closer together than the threshold go out in one timed call
+        end = i + 1
+        if batch_threshold is not None:
+            typo_at = next_typo.position if next_typo.position > i else len(text)
+            limit = min(i + KEY_BATCH_MAX, ready, typo_at)
+            while (end < limit and plan.delays[end - 1] * scale < batch_threshold
+                   and text[end] != '\r'):
+                end += 1
+        
+        if not _await_keystroke(scheduler, controller):
+            break
+        emit_start = scheduler.clock()
+        if end == i + 1:
+            backend.type_char(char)
+            gaps = ()
         else:
-            # Enhanced typo simulation
-            if random.random() < 0.006:  # 0.6% chance of typo
-                wrong_chars = 'qwertyuiopasdfghjklzxcvbnm'
-                if char.isalpha():
-                    wrong_char = random.choice(wrong_chars)
-                    pyautogui.write(wrong_char)
-                    time.sleep(random.uniform(0.08, 0.25))  # Notice mistake
-                    pyautogui.press('backspace')
-                    time.sleep(random.uniform(0.03, 0.12))  # Correct
-            
-            pyautogui.write(char)
+            gaps = [delay * scale for delay in plan.view(i, end - 1).tolist()]
+            backend.write_timed(text[i:end], gaps)
+            batched_until = end
+        last = end - 1
+        controller.mark_emitted(last)
+        if journal is not None:
+            journal.note(document.digest, end, emit_start)
         
-        chars_typed += 1
+        if telemetry is not None:
+            deadline = scheduler.deadline
+            telemetry.record(
+                i,
+                deadline - last_deadline if last_deadline is not None else 0.0,
+                emit_start - last_emit if last_emit is not None else 0.0,
+                scheduler.clock() - emit_start,
+                scheduler.lateness)
+            last_deadline, last_emit = deadline, emit_start
+            for k, gap in enumerate(gaps, i + 1):
+                # Timed inside the backend, so batched keys record their planned gap
+                telemetry.record(k, gap, gap, 0.0, 0.0)
+                last_deadline += gap
+                last_emit += gap
         
-        # Enhanced delay calculation
-        delay = calculate_char_delay_enhanced(base_wpm, char, i, len(text), current_flow_state, prev_char)
-        time.sleep(delay)
+        chars_typed += end - i
         
-        prev_char = char
+        # Planned delay until the next character's deadline, scaled to hold the rate
+        for gap in gaps:
+            scheduler.advance(gap)
+        if wpm_control is not None:
+            scale = wpm_control.update(emit_start + sum(gaps), last, scheduler)
+        # A Python float keeps deadlines in double precision
+        scheduler.advance(float(plan.delays[last]) * scale)
         
-        # Progress update every 40 characters
-        if chars_typed % 40 == 0:
-            elapsed_time = time.time() - start_time
+        # Progress every PROGRESS_INTERVAL seconds, queued for the reporter thread
+        if emit_start >= next_progress:
+            next_progress = emit_start + reporter.interval
+            elapsed_time = scheduler.clock() - start_time
             current_wpm = (chars_typed / 5) / (elapsed_time / 60) if elapsed_time > 0 else 0
-            progress = (i / len(text)) * 100
-            print(f"[PROGRESS] {progress:.1f}% | WPM: {current_wpm:.1f} | Flow: {current_flow_state}")
+            reporter.progress(last, len(text), current_wpm, plan.flow_state(last))
+    else:
+        completed = True
     
     # Completion handling
-    if typing_state == TYPING_ACTIVE:
-        elapsed_time = time.time() - start_time
+    if completed:
+        elapsed_time = scheduler.clock() - start_time
         final_wpm = (chars_typed / 5) / (elapsed_time / 60) if elapsed_time > 0 else 0
-        print(f"\n[SUCCESS] ✅ Completed typing {chars_typed} characters!")
-        print(f"[STATS] ⏱️  Time: {elapsed_time:.1f}s | WPM: {final_wpm:.1f}")
+        reporter.log(f"\n[SUCCESS] ✅ Completed typing {chars_typed} characters!",
+                     event='done', chars=chars_typed, seconds=round(elapsed_time, 3),
+                     wpm=round(final_wpm, 1))
+        reporter.log(f"[STATS] ⏱️  Time: {elapsed_time:.1f}s | WPM: {final_wpm:.1f}")
+        reporter.log(f"[STATS] 🎯 Lateness: mean "
+                     f"{scheduler.mean_lateness * 1000:.2f}ms | "
+                     f"max {scheduler.max_lateness * 1000:.2f}ms")
         
         # Reset position for next run
-        with typing_lock:
-            typing_position = 0
+        controller.reset_position()
+        if journal is not None:
+            journal.save_later(document.digest, 0, sync=True)
+    else:
+        reporter.log(f"\n[INFO] 🛑 Typing stopped at position {controller.position} "
+                     f"(last typed index {controller.last_emitted})",
+                     event='stopped', position=controller.position)
+        if journal is not None:
+            journal.save_later(document.digest, controller.position, sync=True)
+    
+    if isinstance(scheduler.sleep, PrecisionTimer):
+        scheduler.sleep.print_summary(reporter.log)
+        scheduler.sleep.close()
     
-    typing_state = TYPING_STOPPED
+    if telemetry is not None and telemetry.count:
+        telemetry.print_summary(reporter.log)
+        if TELEMETRY_EXPORT_PATH:
+            path = TELEMETRY_EXPORT_PATH
+            reporter.defer(lambda: _export_telemetry(telemetry, path, reporter))
+    
+    controller.stop()
+    return completed
 
-def start_typing_enhanced(custom_wpm=None):
-    """Enhanced start function with position tracking"""
-    global typing_state, typing_thread, typing_position
+def _export_telemetry(telemetry, path, reporter):
+    try:
+        telemetry.export(path)
+        reporter.log(f"[INFO] 💾 Telemetry saved to {path}")
+    except OSError as e:
+        reporter.log(f"[WARNING] ⚠️  Could not save telemetry: {e}", event='warning')
+
+def erase_typed(count, backend=None, controller=None, on_erase=None, rng=random):
+    """Press backspace count times at a quick, steady pace; returns the number sent"""
+    backend = backend or get_output_backend()
+    controller = controller or session
+    timer = PrecisionTimer(controller.sleep)
+    scheduler = DeadlineScheduler(sleep=timer)
+    scheduler.start()
+    try:
+        for sent in range(count):
+            if not _await_keystroke(scheduler, controller):
+                return sent
+            backend.press('backspace')
+            if on_erase is not None:
+                on_erase()
+            scheduler.advance(rng.uniform(0.03, 0.08))
+        return count
+    finally:
+        timer.close()
+
+def _await_plan(plan, position, controller):
+    """Wait for a streaming plan to reach position, or a stop; returns plan.ready"""
+    while True:
+        ready = plan.wait_ready(position, 0.1)
+        if (ready > position or controller.state == TYPING_STOPPED
+                or plan.error is not None):
+            return ready
+
+def _send_typo(actions, backend, scheduler, controller):
+    """Send one planned typo; if stopped part way, erase it so no wrong text is left"""
+    wrong = 0
+    for key, delay in actions:
+        if not _await_keystroke(scheduler, controller):
+            for _ in range(wrong):
+                backend.press('backspace')
+            return False
+        if key == TYPO_BACKSPACE:
+            backend.press('backspace')
+            wrong -= 1
+        else:
+            backend.type_char(key)
+            wrong += 1
+        scheduler.advance(delay)
+    return True
+
+def _await_keystroke(scheduler, controller):
+    """Wait for the next deadline, blocking while paused; False once stopped"""
+    scheduler.wait()
+    while controller.state != TYPING_ACTIVE:
+        if not controller.wait_while_paused():
+            return False
+        scheduler.rebase()
+    return True
+
+# Typing job states
+JOB_QUEUED = 'queued'
+JOB_TYPING = 'typing'
+JOB_PAUSED = 'paused'
+JOB_DONE = 'done'
+JOB_CANCELLED = 'cancelled'
+JOB_FAILED = 'failed'
+
+class TypingJob:
+    """One snippet to type, with its own position and session state"""
     
-    if typing_state == TYPING_ACTIVE:
-        print("[INFO] ⚠️  Already typing! Use F8 to pause or F10 to stop.")
-        return
+    def __init__(self, job_id, document, wpm, priority=0, source='text', countdown=0):
+        self.id = job_id
+        self.document = document
+        self.wpm = wpm
+        self.priority = priority      # Higher runs first; equal priorities run in order
+        self.source = source          # 'clipboard', 'file:<path>' or 'text'
+        self.countdown = countdown    # Seconds to place the cursor when starting idle
+        self.session = SessionController()
+        self.cancelled = False
+        self.finished = None          # JOB_DONE, JOB_CANCELLED or JOB_FAILED once over
+        self.erase_from = None        # Stopped job whose diverged text is erased first
+        self.erase_count = 0
+    
+    @property
+    def state(self):
+        if self.finished:
+            return self.finished
+        if self.session.state == TYPING_ACTIVE:
+            return JOB_TYPING
+        if self.session.state == TYPING_PAUSED:
+            return JOB_PAUSED
+        return JOB_QUEUED
+    
+    def status(self):
+        length = self.document.char_count
+        return {
+            'id': self.id,
+            'source': self.source,
+            'state': self.state,
+            'priority': self.priority,
+            'wpm': self.wpm,
+            'position': self.session.position,
+            'length': length,
+            'progress': self.session.position / length * 100 if length else 100.0,
+        }
+    
+    def metrics(self):
+        """Status plus live throughput and timing percentiles of the current/last run"""
+        metrics = self.status()
+        telemetry = self.session.telemetry
+        if telemetry is None or not telemetry.count:
+            return metrics
+        summary = telemetry.summary()
+        interval = summary['interval']['mean']
+        metrics.update({
+            'keys': telemetry.count,
+            'achieved_wpm': 12.0 / interval if interval else 0.0,
+            'interval_ms': {key: summary['interval'][key] * 1000
+                            for key in ('p50', 'p95', 'p99')},
+            'lateness_ms': {key: summary['lateness'][key] * 1000
+                            for key in ('p50', 'p95', 'p99', 'max')},
+        })
+        return metrics
+
+class TypingEngine:
+    """Asyncio job queue that types snippets back to back on one worker thread"""
+    
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.jobs = OrderedDict()     # id -> TypingJob, in submission order
+        self.current = None           # Job being typed, if any
+        self.last_run = None          # Most recent job that reached the keyboard
+        self._ids = count(1)
+        self._order = count()         # Tie-breaker that keeps equal priorities in order
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._runner = None
+        self._started = threading.Lock()
+        self._worker = None
+    
+    def start(self):
+        """Run the event loop on a background thread, once"""
+        with self._started:
+            if self._loop is not None:
+                return
+            from concurrent.futures import ThreadPoolExecutor
+            self._worker = ThreadPoolExecutor(max_workers=1,
+                                              thread_name_prefix='autotyper-typing')
+            self._loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            
+            def run():
+                asyncio.set_event_loop(self._loop)
+                self._queue = asyncio.PriorityQueue()
+                self._runner = self._loop.create_task(self._run())
+                self._loop.call_soon(ready.set)
+                self._loop.run_forever()
+            
+            self._thread = threading.Thread(target=run, name='autotyper-engine',
+                                            daemon=True)
+            self._thread.start()
+            ready.wait()
+    
+    def call(self, coroutine, timeout=None):
+        """Run an engine coroutine from any other thread and return its result"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+    
+    def shutdown(self):
+        """Stop every job and the event loop"""
+        if self._loop is None:
+            return
+        for job in list(self.jobs.values()):
+            job.cancelled = True
+            job.session.stop()
+        
+        async def close():
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._loop.stop()
+        
+        asyncio.run_coroutine_threadsafe(close(), self._loop)
+        self._thread.join(timeout=2.0)
+        self._worker.shutdown(wait=True)  # The stopped job checkpoints on the way out
+        if _checkpoint_journal is not None:
+            _checkpoint_journal.close()
+    
+    async def submit(self, text, wpm=None, priority=0, source='text', countdown=0,
+                     resume=True):
+        """Queue text (or a Document) and return its job, planned before its turn"""
+        loop = asyncio.get_running_loop()
+        wpm = wpm or DEFAULT_BASE_WPM
+        if isinstance(text, Document):
+            document = text
+        else:
+            document = await loop.run_in_executor(None, document_cache.get, text)
+        # Plan before the job exists, so a failed plan leaves no queued job behind
+        await loop.run_in_executor(None, document.plan, wpm)
+        job = TypingJob(next(self._ids), document, wpm, priority, source, countdown)
+        
+        # Pick up where an earlier job on the same or an edited text was stopped
+        if resume:
+            position, earlier, erase_count = self.resume_point(document)
+            job.session.position = position
+            if erase_count:
+                job.erase_from, job.erase_count = earlier, erase_count
+            elif earlier is not None:
+                earlier.session.reset_position()
+        
+        self.jobs[job.id] = job
+        await self._queue.put((-priority, next(self._order), job))
+        return job
+    
+    def stopped_job(self, document):
+        """Latest job on document that was stopped part way, if any"""
+        for job in reversed(self.jobs.values()):
+            if (job.document is document and job.finished == JOB_CANCELLED
+                    and job.session.position):
+                return job
+        return None
+    
+    def resume_point(self, document):
+        """Where typing document resumes: (position, earlier job, chars to erase)"""
+        earlier = self.stopped_job(document)
+        if earlier is not None:
+            return earlier.session.position, earlier, 0
+        
+        journal = get_checkpoint_journal()
+        position = journal.position(document.digest) if journal else 0
+        position = position if position < document.char_count else 0
+        
+        # An edited copy of the text stopped last: continue from the first change
+        last = self.last_run
+        if (last is not None and last.finished == JOB_CANCELLED
+                and last.session.position):
+            typed = last.session.position
+            matched = common_prefix_length(last.document.text, document.text, typed)
+            if matched < RESUME_MIN_MATCH and matched < typed:
+                if position:
+                    return position, None, 0  # A text of its own, typed before
+                matched = 0  # Too little in common to keep: type it over from the start
+            return matched, last, typed - matched if RESUME_ERASE_DIVERGED else 0
+        
+        return position, None, 0
     
+    def resume_position(self, document):
+        return self.resume_point(document)[0]
+    
+    def pending_job(self, document):
+        """Job on document that is still queued or typing, if any"""
+        for job in self.jobs.values():
+            if job.document is document and not job.finished and not job.cancelled:
+                return job
+        return None
+    
+    def _find(self, job_id):
+        if job_id is None:
+            return self.current
+        return self.jobs.get(job_id)
+    
+    async def pause(self, job_id=None):
+        """Pause the typing job (the current one by default)"""
+        job = self._find(job_id)
+        return job is not None and job.session.pause()
+    
+    async def resume(self, job_id=None):
+        job = self._find(job_id)
+        return job is not None and job.session.resume()
+    
+    async def cancel(self, job_id=None):
+        """Stop a running job where it is, or drop a queued one"""
+        job = self._find(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancelled = True
+        if not job.session.stop() and job is not self.current:
+            job.finished = JOB_CANCELLED
+        return True
+    
+    async def reset(self):
+        """Forget stopped jobs' positions and checkpoints, so typing starts over"""
+        for job in self.jobs.values():
+            if job.finished:
+                job.session.reset_position()
+        journal = get_checkpoint_journal()
+        if journal is not None:
+            journal.clear()
+    
+    async def status(self, job_id=None):
+        """Status of one job, or of every job in submission order"""
+        if job_id is not None:
+            job = self.jobs.get(job_id)
+            return job.status() if job else None
+        return [job.status() for job in self.jobs.values()]
+    
+    async def lookup(self, document):
+        """Pending job on document and its resume_point, read where jobs change"""
+        return self.pending_job(document), self.resume_point(document)
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        idle = True
+        while True:
+            _, _, job = await self._queue.get()
+            if job.cancelled:
+                job.finished = JOB_CANCELLED
+                continue
+            
+            self.current = job
+            try:
+                if idle and job.countdown:
+                    print(f"[INFO] ⏰ Starting in {job.countdown} seconds... "
+                          f"Position your cursor!")
+                    for remaining in range(job.countdown, 0, -1):
+                        print(f"[INFO] ⏱️  {remaining}...")
+                        await asyncio.sleep(1)
+                
+                if job.cancelled or not job.session.start():
+                    job.finished = JOB_CANCELLED
+                    continue
+                self.last_run = job
+                
+                if job.erase_count and not await self._erase(job):
+                    # The earlier job still describes the screen
+                    job.session.reset_position()
+                    self.last_run = job.erase_from
+                    job.finished = JOB_CANCELLED
+                    continue
+                completed = await loop.run_in_executor(
+                    self._worker, human_type_enhanced, job.document.text, job.wpm,
+                    self.backend, None, job.session, get_checkpoint_journal())
+                if completed:
+                    job.session.position = job.document.char_count
+                job.finished = JOB_DONE if completed else JOB_CANCELLED
+            except Exception as e:
+                print(f"[ERROR] ❌ Job {job.id} failed: {e}")
+                job.session.stop()
+                job.finished = JOB_FAILED
+            finally:
+                self.current = None
+                idle = self._queue.empty()
+
+    async def _erase(self, job):
+        """Backspace over the earlier job's diverged text; False if stopped part way"""
+        earlier = job.erase_from
+        print(f"[INFO] ✂️  Text changed at position {job.session.position}: "
+              f"erasing {job.erase_count} characters")
+        
+        def erased_one():
+            earlier.session.position -= 1
+        
+        erased = await asyncio.get_running_loop().run_in_executor(
+            self._worker, erase_typed, job.erase_count, self.backend, job.session,
+            erased_one)
+        if erased < job.erase_count:
+            return False
+        earlier.session.reset_position()
+        job.erase_count = 0
+        return True
+
+engine = TypingEngine()
+
+class ClipboardWatcher:
+    """Background poller that prepares copied text, so a hotkey only starts typing"""
+    
+    def __init__(self, min_interval=CLIPBOARD_POLL_MIN, max_interval=CLIPBOARD_POLL_MAX,
+                 backoff=CLIPBOARD_POLL_BACKOFF):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.polls = 0
+        self.changes = 0
+        self.error = None             # Last clipboard error, reported once
+        self.wpms = deque(maxlen=3)   # Speeds recently typed at, planned for new text
+        self._prepared = (None, None)  # ((length, hash), Document) last prepared
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run,
+                                            name='autotyper-clipboard', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+    
+    def note_wpm(self, wpm):
+        """Plan future clipboard text at wpm too"""
+        if wpm in self.wpms:
+            self.wpms.remove(wpm)
+        self.wpms.append(wpm)
+    
+    def lookup(self, text):
+        """Prepared Document for text, or None if the watcher hasn't seen it yet"""
+        signature, document = self._prepared
+        if document is not None and signature == (len(text), hash(text)):
+            return document
+        return None
+    
+    def poll(self):
+        """Check the clipboard once and prepare its text if changed; True on a change"""
+        self.polls += 1
+        text = pyperclip.paste() or ''
+        signature = (len(text), hash(text))  # Much cheaper than content_hash
+        if signature == self._prepared[0]:
+            return False
+        
+        self.changes += 1
+        document = None
+        if text.strip():
+            document = document_cache.get(text)
+            for wpm in {DEFAULT_BASE_WPM, *self.wpms}:
+                document.plan(wpm)
+        self._prepared = (signature, document)
+        return True
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if engine.current is not None:
+                # Leave the CPU to the typing thread; later copies are picked up after
+                self.interval = self.max_interval
+                continue
+            try:
+                changed = self.poll()
+                self.error = None
+            except Exception as e:
+                if str(e) != self.error:
+                    print(f"[WARNING] ⚠️  Clipboard watcher: {e}")
+                self.error = str(e)
+                changed = False
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+
+clipboard_watcher = None
+
+class ControlServer:
+    """JSON-lines control protocol on a local socket, served from the engine's loop"""
+    
+    COMMANDS = ('ping', 'submit', 'start', 'pause', 'resume', 'stop', 'status',
+                'metrics')
+    
+    def __init__(self, engine, address=None):
+        self.engine = engine
+        self.address = address or CONTROL_ADDRESS
+        self.requests = 0
+        self._server = None
+    
+    async def start(self):
+        """Listen on the Unix socket path, or on host:port for TCP"""
+        host, _, port = self.address.rpartition(':')
+        if port.isdigit():
+            self._server = await asyncio.start_server(self._serve, host or 'localhost',
+                                                      int(port),
+                                                      limit=CONTROL_MAX_REQUEST)
+        else:
+            try:
+                mode = os.stat(self.address).st_mode
+            except FileNotFoundError:
+                mode = None
+            if mode is not None:
+                if not stat.S_ISSOCK(mode):
+                    raise FileExistsError(f"{self.address} exists and is not a socket")
+                os.unlink(self.address)  # Left behind by a previous run
+            self._server = await asyncio.start_unix_server(self._serve, self.address,
+                                                           limit=CONTROL_MAX_REQUEST)
+            os.chmod(self.address, 0o600)
+    
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            is_tcp = self.address.rpartition(':')[2].isdigit()
+            if not is_tcp and os.path.exists(self.address):
+                os.unlink(self.address)
+    
+    async def _serve(self, reader, writer):
+        """One request object per line in, one response object per line out"""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # The rest of an overlong line would be read as requests, so hang up
+                    response = {'ok': False, 'error': "request longer than "
+                                                      f"{CONTROL_MAX_REQUEST} bytes"}
+                    writer.write(json.dumps(response).encode() + b'\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    result = await self.handle(json.loads(line))
+                    response = {'ok': True, 'result': result}
+                except KeyError as e:
+                    response = {'ok': False, 'error': f"missing field {e}"}
+                except (ValueError, TypeError) as e:
+                    response = {'ok': False, 'error': str(e)}
+                except Exception as e:  # Whatever the request, the client gets a reply
+                    response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def handle(self, request):
+        """Run one command, e.g. {"command": "pause", "job": 2}; returns its result"""
+        if not isinstance(request, dict):
+            raise ValueError("request must be a JSON object")
+        command = request.get('command')
+        if command not in self.COMMANDS:
+            raise ValueError(f"unknown command {command!r}")
+        self.requests += 1
+        engine = self.engine
+        job_id = request.get('job')
+        
+        if command == 'ping':
+            return 'pong'
+        if command in ('submit', 'start'):
+            if command == 'start':
+                loop = asyncio.get_running_loop()
+                text = await loop.run_in_executor(None, pyperclip.paste)
+                source = 'clipboard'
+            else:
+                text = request['text']
+                source = request.get('source', 'control')
+            if not isinstance(text, str) or not text.strip():
+                raise ValueError("nothing to type")
+            wpm = self._number(request, 'wpm', DEFAULT_BASE_WPM, *WPM_RANGE)
+            priority = self._number(request, 'priority', 0)
+            countdown = self._number(request, 'countdown', 0)
+            job = await engine.submit(text, wpm, priority, source, countdown)
+            return job.status()
+        if command == 'pause':
+            return await engine.pause(job_id)
+        if command == 'resume':
+            return await engine.resume(job_id)
+        if command == 'stop':
+            return await engine.cancel(job_id)
+        if command == 'status':
+            return await engine.status(job_id)
+        
+        if job_id is not None:
+            job = engine.jobs.get(job_id)
+        else:
+            job = engine.current or engine.last_run
+        return job.metrics() if job is not None else None
+    
+    @staticmethod
+    def _number(request, field, default, low=0, high=math.inf):
+        """Numeric request field within low..high, or default when absent"""
+        value = request.get(field)
+        if value is None:
+            return default
+        if (isinstance(value, bool) or not isinstance(value, (int, float))
+                or not low <= value <= high):
+            raise ValueError(f"{field} must be a number from {low} to {high}")
+        return value
+
+control_server = None
+
+def start_control_server(address=None):
+    """Serve the control protocol from the engine's loop; None if the socket fails"""
+    global control_server
+    server = ControlServer(engine, address)
+    try:
+        engine.call(server.start())
+    except OSError as e:
+        print(f"[WARNING] ⚠️  Could not open control socket {server.address}: {e}")
+        return None
+    control_server = server
+    print(f"[INFO] 🔌 Control socket listening on {server.address}")
+    return server
+
+def stop_control_server():
+    global control_server
+    if control_server is not None:
+        engine.call(control_server.close())
+        control_server = None
+
+def control_request(command, address=None, timeout=5.0, **fields):
+    """Send one command to a running control server and return its result"""
+    import socket
+    
+    address = address or CONTROL_ADDRESS
+    host, _, port = address.rpartition(':')
+    if port.isdigit():
+        connection = socket.create_connection((host or 'localhost', int(port)), timeout)
+    else:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        connection.connect(address)
+    with connection, connection.makefile('rwb') as stream:
+        stream.write(json.dumps({'command': command, **fields}).encode() + b'\n')
+        stream.flush()
+        response = json.loads(stream.readline())
+    if not response['ok']:
+        raise RuntimeError(response['error'])
+    return response['result']
+
+def clipboard_document(text):
+    """Document for clipboard text, prepared by the watcher when it is running"""
+    document = clipboard_watcher.lookup(text) if clipboard_watcher is not None else None
+    return document if document is not None else document_cache.get(text)
+
+def run_deferred(callback):
+    """Hotkey handler that runs callback on a worker, so the keyboard hook stays free"""
+    def handler():
+        _get_hotkey_queue().put(callback)
+    return handler
+
+_hotkey_queue = None
+
+def _get_hotkey_queue():
+    """Queue of hotkey callbacks, run in order on one worker thread"""
+    global _hotkey_queue
+    if _hotkey_queue is None:
+        import queue
+        _hotkey_queue = queue.SimpleQueue()
+        
+        def worker():
+            while True:
+                callback = _hotkey_queue.get()
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[ERROR] ❌ Hotkey action failed: {e}")
+        
+        threading.Thread(target=worker, name='autotyper-hotkeys', daemon=True).start()
+    return _hotkey_queue
+
+def start_typing_enhanced(custom_wpm=None):
+    """Enhanced start function with position tracking"""
     # Get clipboard content
     try:
         text = pyperclip.paste()
@@ -295,94 +3108,114 @@ def start_typing_enhanced(custom_wpm=None):
         print("[WARNING] ⚠️  Clipboard is empty or contains only whitespace!")
         return
     
-    # Clean and analyze text
-    original_length = len(text)
-    cleaned_text = clean_clipboard_text_advanced(text)
+    # Clean and analyze text, unless the clipboard watcher already has
+    document = clipboard_document(text)
+    
+    pending, (typing_position, earlier, erase_count) = engine.call(
+        engine.lookup(document))
+    if pending is not None:
+        print("[INFO] ⚠️  Already typing this text! Use F8 to pause or F10 to stop.")
+        return
     
-    if original_length != len(cleaned_text):
-        print(f"[INFO] 🧹 Advanced cleaning: {original_length} → {len(cleaned_text)} characters")
+    if document.original_length != document.char_count:
+        print(f"[INFO] 🧹 Advanced cleaning: {document.original_length} → "
+              f"{document.char_count} characters")
     
     # Show analysis
-    char_count = len(cleaned_text)
-    line_count = cleaned_text.count('\n') + 1
-    word_count = len(cleaned_text.split())
+    char_count = document.char_count
+    line_count = document.line_count
+    word_count = document.word_count
     
-    with typing_lock:
-        remaining_chars = char_count - typing_position
-        remaining_words = len(' '.join(cleaned_text.split()[typing_position//5:]))
+    index = document.index
+    remaining_chars = max(0, char_count - typing_position)
+    if earlier is not None and earlier.document is not document:
+        typed = earlier.session.position
+        if erase_count:
+            print(f"[INFO] ✂️  Text edited at position {typing_position}: "
+                  f"{erase_count} typed characters will be erased first")
+        elif typing_position < typed:
+            print(f"[WARNING] ⚠️  Text edited at position {typing_position}: "
+                  f"delete the last {typed - typing_position} typed characters "
+                  f"before it resumes")
     
     print(f"\n[INFO] 📋 Enhanced typing analysis:")
     print(f"[INFO] 📊 Total: {char_count} chars, {word_count} words, {line_count} lines")
     print(f"[INFO] 📍 Position: {typing_position}/{char_count} ({remaining_chars} remaining)")
+    print(f"[INFO] 📄 Remaining: {index.remaining_words(typing_position)} words, "
+          f"{index.remaining_lines(typing_position)} lines")
     
-    # Calculate estimated time
+    # Plan the delays now so the estimate is exact and the job starts immediately
     wpm = custom_wpm or DEFAULT_BASE_WPM
-    estimated_time = (remaining_words / wpm) * 60 if remaining_words > 0 else 0
+    if clipboard_watcher is not None:
+        clipboard_watcher.note_wpm(wpm)
+    document.plan(wpm)
+    estimated_time = document.estimated_time(typing_position, wpm)
     print(f"[INFO] ⏱️  Estimated time: {estimated_time:.1f}s at {wpm} WPM")
     
     # Show preview from current position
-    preview_start = max(0, typing_position - 20)
-    preview_text = cleaned_text[preview_start:typing_position + 80]
-    preview_clean = preview_text.replace('\n', '↵').replace('\t', '→')
-    
-    if typing_position > 0:
-        marker_pos = min(20, typing_position - preview_start)
-        preview_display = preview_clean[:marker_pos] + "⚡" + preview_clean[marker_pos:]
-    else:
-        preview_display = preview_clean
-    
-    print(f"[INFO] 👀 Preview: {preview_display[:100]}{'...' if len(preview_display) > 100 else ''}")
+    print(f"[INFO] 👀 Preview: {index.preview(typing_position, 20, 80, 100)}")
     
-    # Countdown
-    print(f"[INFO] ⏰ Starting in 3 seconds... Position your cursor!")
-    for i in range(3, 0, -1):
-        print(f"[INFO] ⏱️  {i}...")
-        time.sleep(1)
-    
-    # Start typing
-    typing_state = TYPING_ACTIVE
-    typing_thread = threading.Thread(target=human_type_enhanced, args=(cleaned_text, wpm), daemon=True)
-    typing_thread.start()
+    # Queue it; the engine counts down only when nothing else is typing
+    busy = engine.current
+    job = engine.call(engine.submit(document, wpm, source='clipboard', countdown=3))
+    if busy is not None:
+        print(f"[INFO] 📥 Queued as job {job.id}, starts right after job {busy.id}")
 
 def pause_typing():
     """Pause typing"""
-    global typing_state
-    
-    if typing_state == TYPING_ACTIVE:
-        typing_state = TYPING_PAUSED
-        print(f"\n[INFO] ⏸️  Typing PAUSED at position {typing_position}")
+    job = engine.current
+    if job is not None and engine.call(engine.pause(job.id)):
+        print(f"\n[INFO] ⏸️  Typing PAUSED at position {job.session.position}")
     else:
         print(f"[INFO] ⚠️  No active typing to pause.")
 
 def stop_typing():
     """Stop typing and reset position"""
-    global typing_state, typing_position
-    
-    if typing_state in [TYPING_ACTIVE, TYPING_PAUSED]:
-        typing_state = TYPING_STOPPED
-        print(f"\n[INFO] 🛑 Typing STOPPED at position {typing_position}")
+    job = engine.current
+    if job is not None and engine.call(engine.cancel(job.id)):
+        print(f"\n[INFO] 🛑 Typing STOPPED at position {job.session.position}")
         print("[INFO] 💡 Position preserved for resume")
     else:
         print(f"[INFO] ⚠️  No active typing to stop.")
 
 def reset_position():
     """Reset typing position to beginning"""
-    global typing_position
-    
-    with typing_lock:
-        typing_position = 0
+    engine.call(engine.reset())
     print("[INFO] 🔄 Position reset to beginning")
 
 def resume_or_start():
     """Resume if paused, or start new typing"""
-    global typing_state
-    
-    if typing_state == TYPING_PAUSED:
-        typing_state = TYPING_ACTIVE
-        print(f"\n[INFO] ▶️  Typing RESUMED from position {typing_position}")
+    job = engine.current
+    if job is not None and engine.call(engine.resume(job.id)):
+        print(f"\n[INFO] ▶️  Typing RESUMED from position {job.session.position}")
     else:
         start_typing_enhanced()
 
+def queue_file(path, custom_wpm=None):
+    """Queue a text file as a typing job"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"[ERROR] ❌ Could not read {path}: {e}")
+        return
+    if not text.strip():
+        print(f"[WARNING] ⚠️  {path} is empty!")
+        return
+    
+    job = engine.call(engine.submit(text, custom_wpm, source=f'file:{path}',
+                                    countdown=3))
+    print(f"[INFO] 📥 Queued {path} as job {job.id} ({job.document.char_count} chars)")
+
+def show_jobs():
+    """List queued, running and finished jobs"""
+    jobs = engine.call(engine.status())
+    if not jobs:
+        print("🗂️  No jobs yet")
+    for job in jobs:
+        print(f"🗂️  #{job['id']} {job['state']:<9} {job['progress']:5.1f}% "
+              f"({job['position']}/{job['length']}) {job['wpm']} WPM | {job['source']}")
+
 def test_accessibility_permissions():
     """Test if we have proper accessibility permissions"""
     try:
@@ -476,7 +3309,7 @@ def setup_hotkeys():
         print("[INFO] 🎹 Registering enhanced hotkeys...")
         for hotkey, description, callback in hotkeys:
             try:
-                keyboard.add_hotkey(hotkey, callback)
+                keyboard.add_hotkey(hotkey, run_deferred(callback))
                 print(f"[INFO] ✅ {description}")
                 successful_count += 1
             except Exception as e:
@@ -542,7 +3375,7 @@ def try_alternative_hotkeys():
         
         for hotkey, description, callback in alternative_hotkeys:
             try:
-                keyboard.add_hotkey(hotkey, callback)
+                keyboard.add_hotkey(hotkey, run_deferred(callback))
                 print(f"[INFO] ✅ {description}")
                 successful_count += 1
             except Exception as e:
@@ -594,20 +3427,31 @@ def show_status_enhanced():
         TYPING_PAUSED: "🟡 PAUSED"
     }
     
+    job = engine.current
+    typing_state = job.session.state if job else TYPING_STOPPED
+    waiting = sum(1 for status in engine.call(engine.status())
+                  if status['state'] == JOB_QUEUED)
+    
     print(f"\n📊 ENHANCED STATUS: {state_names.get(typing_state, 'UNKNOWN')}")
     print(f"⚡ WPM: {DEFAULT_BASE_WPM} (Gaussian distribution)")
-    print(f"📍 Position: {typing_position}")
+    if job is not None:
+        print(f"🗂️  Job {job.id} ({job.source}) at "
+              f"{job.session.position}/{job.document.char_count} | {waiting} waiting")
+    elif waiting:
+        print(f"🗂️  {waiting} jobs waiting")
     
     try:
         clip = pyperclip.paste()
         if clip and clip.strip():
-            original_length = len(clip)
-            cleaned_clip = clean_clipboard_text_advanced(clip)
-            cleaned_length = len(cleaned_clip)
+            document = clipboard_document(clip)
+            _, (typing_position, _, _) = engine.call(engine.lookup(document))
+            print(f"📍 Position: {typing_position}")
+            original_length = document.original_length
+            cleaned_length = document.char_count
             
             char_count = cleaned_length
-            word_count = len(cleaned_clip.split())
-            line_count = cleaned_clip.count('\n') + 1
+            word_count = document.word_count
+            line_count = document.line_count
             
             remaining_chars = max(0, char_count - typing_position)
             progress_pct = (typing_position / char_count * 100) if char_count > 0 else 0
@@ -618,21 +3462,11 @@ def show_status_enhanced():
             if original_length != cleaned_length:
                 print(f"🧹 Will clean: {original_length} → {cleaned_length} characters")
             
-            estimated_time = (remaining_chars / 5 / DEFAULT_BASE_WPM) * 60
+            estimated_time = document.estimated_time(typing_position, DEFAULT_BASE_WPM)
             print(f"⏱️  Estimated time: {estimated_time:.1f}s")
             
             # Show preview around current position
-            preview_start = max(0, typing_position - 15)
-            preview_end = min(len(cleaned_clip), typing_position + 65)
-            preview = cleaned_clip[preview_start:preview_end]
-            preview = preview.replace('\n', '↵').replace('\t', '→')
-            
-            if typing_position > 0 and typing_position < len(cleaned_clip):
-                marker_pos = typing_position - preview_start
-                if marker_pos < len(preview):
-                    preview = preview[:marker_pos] + "⚡" + preview[marker_pos:]
-            
-            print(f"👀 Preview: {preview[:80]}{'...' if len(preview) > 80 else ''}")
+            print(f"👀 Preview: {document.index.preview(typing_position, 15, 65, 80)}")
         else:
             print("📋 Clipboard: Empty")
     except Exception:
@@ -640,7 +3474,7 @@ def show_status_enhanced():
 
 def manual_mode_enhanced():
     """Enhanced manual mode with position controls"""
-    global typing_state, DEFAULT_BASE_WPM
+    global DEFAULT_BASE_WPM
     
     print("\n" + "="*65)
     print("      📝 ENHANCED MANUAL MODE - Advanced Features")
@@ -660,15 +3494,21 @@ def manual_mode_enhanced():
     print("   • 3 = Fast (120 WPM) | 4 = Custom 100 WPM")
     print("   • 5 = Custom 150 WPM | [number] = Custom WPM")
     print("   • r = Reset position | Enter = Current speed")
+    print("   • f <path> = Queue a file | j = List jobs")
     
     while True:
         try:
             show_status_enhanced()
             
-            command = input("\n>>> [1-5/r/Enter/WPM]=Start | 'q'=Quit: ").strip().lower()
+            entry = input("\n>>> [1-5/r/f/j/Enter/WPM]=Start | 'q'=Quit: ").strip()
+            command = entry.lower()
             
             if command in ['q', 'quit', 'exit']:
                 break
+            elif command.startswith('f '):
+                queue_file(entry[2:].strip())
+            elif command in ('j', 'jobs'):
+                show_jobs()
             elif command == 'r' or command == 'reset':
                 reset_position()
             elif command == '1':
@@ -683,11 +3523,12 @@ def manual_mode_enhanced():
                 start_typing_custom_150()
             elif command.isdigit():
                 custom_wpm = int(command)
-                if 10 <= custom_wpm <= 300:
+                if WPM_RANGE[0] <= custom_wpm <= WPM_RANGE[1]:
                     print(f"[INFO] ⚡ Custom WPM: {custom_wpm}")
                     start_typing_enhanced(custom_wpm)
                 else:
-                    print("[ERROR] ❌ WPM must be between 10-300")
+                    print(f"[ERROR] ❌ WPM must be between "
+                          f"{WPM_RANGE[0]}-{WPM_RANGE[1]}")
             else:
                 print("[ERROR] ❌ Invalid command. Use 1-5, 'r', number, or Enter")
                 
@@ -700,9 +3541,203 @@ def manual_mode_enhanced():
     
     print("\n👋 Thanks for using Enhanced AutoTyper!")
 
+def load_startup_timing_model():
+    """Use a calibrated timing model when one has been fitted"""
+    if TIMING_MODEL_PATH and os.path.exists(TIMING_MODEL_PATH):
+        try:
+            model = load_timing_model()
+            print(f"[INFO] 📐 Timing model: {TIMING_MODEL_PATH} "
+                  f"({model.get('samples', 0):,} keystrokes, "
+                  f"measured {model.get('measured_wpm', 0):.0f} WPM)")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARNING] ⚠️  Could not load timing model {TIMING_MODEL_PATH}: {e}")
+
+def type_command(args):
+    """Type a file, standard input, text or the clipboard without the interactive UI"""
+    if args.progress_json:
+        reporter = ProgressReporter(json_path=args.progress_json)
+    else:
+        reporter = get_progress_reporter()
+    if args.progress_json != '-':
+        return _type_command(args, reporter)
+    
+    # JSON lines own stdout; any other output goes to stderr
+    import contextlib
+    with contextlib.redirect_stdout(sys.stderr):
+        return _type_command(args, reporter)
+
+def _type_command(args, reporter):
+    global SESSION_SEED
+    
+    try:
+        if args.file == '-':
+            text = sys.stdin.read()
+        elif args.file:
+            with open(args.file, encoding='utf-8') as f:
+                text = f.read()
+        elif args.text is not None:
+            text = args.text
+        else:
+            text = pyperclip.paste()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"[ERROR] ❌ Could not read {args.file}: {e}")
+        return 1
+    except Exception as e:
+        print(f"[ERROR] ❌ Could not access clipboard: {e}")
+        return 1
+    
+    if not text or not text.strip():
+        print("[WARNING] ⚠️  Nothing to type!")
+        return 1
+    
+    load_startup_timing_model()
+    if args.seed is not None:
+        SESSION_SEED = args.seed
+    backend = create_output_backend(args.backend) if args.backend else None
+    document = document_cache.get(text)
+    
+    journal = get_checkpoint_journal()
+    if args.resume and journal is not None:
+        position = journal.position(document.digest)
+        session.position = position if position < document.char_count else 0
+    
+    if args.countdown > 0:
+        reporter.log(f"[INFO] ⏰ Starting in {args.countdown:g} seconds... "
+                     f"Position your cursor!",
+                     event='countdown', seconds=args.countdown)
+        time.sleep(args.countdown)
+    
+    # Type on a worker so Ctrl+C stops cleanly and the checkpoint is saved
+    result = []
+    session.start()
+    worker = threading.Thread(
+        target=lambda: result.append(human_type_enhanced(
+            document.text, args.wpm, backend, None, session, journal, reporter)),
+        daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.1)
+    except KeyboardInterrupt:
+        session.stop()
+        worker.join()
+    if journal is not None:
+        journal.close()
+    reporter.flush()
+    return 0 if result and result[0] else 1
+
+def serve_command(args):
+    """Run the engine and control socket until interrupted"""
+    load_startup_timing_model()
+    if args.backend:
+        engine.backend = create_output_backend(args.backend)
+    if start_control_server(args.address) is None:
+        return 1
+    print("[INFO] 🛑 Press Ctrl+C to exit")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n[INFO] 👋 Exiting AutoTyper...")
+    stop_control_server()
+    engine.shutdown()
+    return 0
+
+def control_command(args):
+    """Send one command to a control socket and print the JSON result"""
+    fields = {key: value for key, value in (('job', args.job), ('wpm', args.wpm))
+              if value is not None}
+    if args.file:
+        try:
+            with open(args.file, encoding='utf-8') as f:
+                fields['text'] = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[ERROR] ❌ Could not read {args.file}: {e}")
+            return 1
+        fields['source'] = f'file:{args.file}'
+    try:
+        result = control_request(args.action, args.address, **fields)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"[ERROR] ❌ {args.action} failed: {e}")
+        return 1
+    print(json.dumps(result, indent=1))
+    return 0
+
+def _wpm_argument(value):
+    """argparse type for --wpm: an integer within WPM_RANGE"""
+    import argparse
+    try:
+        wpm = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid WPM {value!r}") from None
+    if not WPM_RANGE[0] <= wpm <= WPM_RANGE[1]:
+        raise argparse.ArgumentTypeError(
+            f"WPM must be between {WPM_RANGE[0]}-{WPM_RANGE[1]}")
+    return wpm
+
+def run_cli(argv=None):
+    """Command line entry point; without a command the interactive tool starts"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='autotyper',
+                                     description="Human-like clipboard auto-typer")
+    commands = parser.add_subparsers(dest='command')
+    type_parser = commands.add_parser(
+        'type', help="type text without the banner, status or hotkeys")
+    source = type_parser.add_mutually_exclusive_group()
+    source.add_argument('--file', help="text file to type, or - for standard input "
+                                       "(default: clipboard)")
+    source.add_argument('--text', help="text to type")
+    type_parser.add_argument('--wpm', type=_wpm_argument, default=DEFAULT_BASE_WPM,
+                             help=f"typing speed (default: {DEFAULT_BASE_WPM})")
+    type_parser.add_argument('--countdown', type=float, default=3.0,
+                             help="seconds to focus the target window first "
+                                  "(default: 3)")
+    type_parser.add_argument('--backend', choices=sorted(OUTPUT_BACKENDS),
+                             help="keystroke output backend")
+    type_parser.add_argument('--seed', type=int,
+                             help="session seed, to replay a run exactly")
+    type_parser.add_argument('--resume', action='store_true',
+                             help="continue from the saved checkpoint for this text")
+    type_parser.add_argument('--progress-json', metavar='PATH',
+                             help="also write progress events as JSON lines to PATH, "
+                                  "or - for stdout only")
+    
+    serve_parser = commands.add_parser(
+        'serve', help="run only the control socket, for automation")
+    serve_parser.add_argument('--address', default=CONTROL_ADDRESS or 'autotyper.sock',
+                              help="Unix socket path or localhost:<port> "
+                                   "(default: %(default)s)")
+    serve_parser.add_argument('--backend', choices=sorted(OUTPUT_BACKENDS),
+                              help="keystroke output backend")
+    
+    control_parser = commands.add_parser(
+        'ctl', help="send one command to a running control socket")
+    control_parser.add_argument('action', choices=ControlServer.COMMANDS)
+    control_parser.add_argument('--address',
+                                default=CONTROL_ADDRESS or 'autotyper.sock',
+                                help="Unix socket path or localhost:<port> "
+                                     "(default: %(default)s)")
+    control_parser.add_argument('--job', type=int,
+                                help="job id (default: the current job)")
+    control_parser.add_argument('--wpm', type=_wpm_argument,
+                                help="typing speed for start and submit")
+    control_parser.add_argument('--file', help="text file for submit")
+    args = parser.parse_args(argv)
+    
+    if args.command == 'type':
+        return type_command(args)
+    if args.command == 'serve':
+        return serve_command(args)
+    if args.command == 'ctl':
+        return control_command(args)
+    main()
+    return 0
+
 # Enhanced main function
 def main():
     """Enhanced main function"""
+    global clipboard_watcher
+    
     print("="*70)
     print("     🤖 AutoTyper v4.0 - Enhanced Edition with Position Tracking")
     print("="*70)
@@ -710,10 +3745,28 @@ def main():
     if HAS_NUMPY:
         print("[INFO] 📋 Gaussian delay distribution for natural typing")
     else:
-        print("[INFO] 📋 Basic random delay distribution")
+        print("[WARNING] 📦 NumPy not found. Using basic random distribution.")
+        print("[INFO] 💻 For better typing realism, install with: pip3 install numpy")
     print("[INFO] 🎯 Position tracking & advanced text cleaning")
     print("[INFO] 🍎 Optimized for macOS with enhanced features")
     
+    load_startup_timing_model()
+    
+    # Prepare copied text in the background so hotkeys start typing straight away
+    if CLIPBOARD_WATCH:
+        clipboard_watcher = ClipboardWatcher()
+        clipboard_watcher.start()
+        print("[INFO] 👀 Watching the clipboard to prepare text ahead of time")
+    
+    if CONTROL_ADDRESS:
+        start_control_server()
+    
+    # Positions from earlier runs, restored when the clipboard holds the same text
+    journal = get_checkpoint_journal()
+    if journal is not None and journal.positions:
+        print(f"[INFO] 💾 {len(journal.positions)} resume checkpoint(s) "
+              f"in {CHECKPOINT_PATH}")
+    
     # Show initial status
     show_status_enhanced()
     
@@ -730,12 +3783,14 @@ def main():
         manual_mode_enhanced()
     
     # Cleanup
-    global typing_state
-    typing_state = TYPING_STOPPED
+    if clipboard_watcher is not None:
+        clipboard_watcher.stop()
+    stop_control_server()
+    engine.shutdown()
     print("\n👋 Thanks for using Enhanced AutoTyper!")
     print("🍎 Tip: Grant accessibility permissions for hotkey mode")
     if not HAS_NUMPY:
         print("💡 Install NumPy for better typing realism: pip3 install numpy")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(run_cli())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+AutoTyper benchmarks - run with: python3 benchmark.py [suite ...]
+
+Every suite checks correctness before it measures anything, so a run that
+prints numbers is also a run that passed. Sessions run headless against a
+virtual clock, so no display or keyboard is needed. Results are written as
+JSON for comparison across revisions (--output, --compare).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import autotyper
+
+def legacy_clean_clipboard_text_advanced(text):
+    """The original line-by-line cleaner, kept as the reference implementation"""
+    if not text:
+        return text
+
+    lines = text.split('\n')
+    cleaned_lines = []
+
+    for line in lines:
+        cleaned_line = line.rstrip()
+        cleaned_line = re.sub(r' {2,}', ' ', cleaned_line)
+        if cleaned_line.startswith('\t') or cleaned_line.startswith('    '):
+            pass
+        else:
+            cleaned_line = cleaned_line.lstrip()
+        cleaned_lines.append(cleaned_line)
+
+    cleaned_text = '\n'.join(cleaned_lines)
+    cleaned_text = re.sub(r'\n{3,}', '\n\n', cleaned_text)
+    return cleaned_text.strip()
+
+def make_document(size, seed=0):
+    """Messy clipboard-like text of roughly size characters"""
+    rng = random.Random(seed)
+    words = ['the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog.',
+             'print(x)', 'value,', 'Quiz', '42', '"quoted"', 'end;']
+    gaps = [' '] * 9 + ['  ']
+    indents = ['', '', '', '\t', '\t\t', '  ', '    ']
+    endings = ['', '', '', '  ', '\t', ' \r']
+    lines = []
+    length = 0
+    while length < size:
+        line = (rng.choice(indents)
+                + ''.join(rng.choice(words) + rng.choice(gaps)
+                          for _ in range(rng.randint(0, 12)))
+                + rng.choice(endings))
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)[:size]
+
+def _best_of(func, arg, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_clean(sizes=(10_000, 1_000_000, 10_000_000), repeat=3):
+    """Time the compiled cleaner and the streaming cleaner against the reference"""
+    results = []
+    for size in sizes:
+        text = make_document(size)
+        # Edge cases are covered by tests/test_clean.py; this guards the numbers below
+        expected = legacy_clean_clipboard_text_advanced(text)
+        if autotyper.clean_clipboard_text_advanced(text) != expected:
+            raise AssertionError(
+                f"cleaner output differs from the reference at {size:,} chars")
+        legacy = _best_of(legacy_clean_clipboard_text_advanced, text, repeat)
+        compiled = _best_of(autotyper.clean_clipboard_text_advanced, text, repeat)
+        chunks = [text[i:i + 65536] for i in range(0, len(text), 65536)]
+        streamed = _best_of(lambda c: ''.join(autotyper.iter_clean_clipboard_text(c)),
+                            chunks, repeat)
+
+        print(f"[BENCH] clean {size:>11,} chars | legacy {legacy * 1000:9.2f}ms | "
+              f"compiled {compiled * 1000:9.2f}ms ({legacy / compiled:4.1f}x) | "
+              f"streamed {streamed * 1000:9.2f}ms")
+        results.append({'size': size, 'legacy_s': legacy, 'compiled_s': compiled,
+                        'streamed_s': streamed})
+    return results
+
+KB = 1024
+MB = 1024 * KB
+DOCUMENT_SIZES = (KB, 10 * KB, 100 * KB, MB, 10 * MB, 100 * MB)
+
+class VirtualClock:
+    """Injectable clock whose sleep() advances time instantly"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+        return True
+
+class SimulatedBackend(autotyper.NullBackend):
+    """Null backend that charges a fixed latency per call to the virtual clock"""
+
+    def __init__(self, clock, latency=0.0):
+        super().__init__()
+        self.clock = clock
+        self.latency = latency
+
+    def write(self, text):
+        super().write(text)
+        self.clock.now += self.latency
+
+    def press(self, key):
+        super().press(key)
+        self.clock.now += self.latency
+
+    def write_timed(self, text, gaps):
+        # One call's latency, then the batch's own timing, as pyautogui.write() does
+        super().write_timed(text, gaps)
+        self.clock.now += self.latency + sum(gaps)
+
+def run_virtual_session(text, wpm, latency=0.0, batch_threshold=None):
+    """Type text through human_type_enhanced on a virtual clock, without any output"""
+    autotyper.KEY_BATCH_THRESHOLD = batch_threshold
+    clock = VirtualClock()
+    backend = SimulatedBackend(clock, latency)
+    scheduler = autotyper.DeadlineScheduler(clock=clock, sleep=clock.sleep)
+    document = autotyper.document_cache.get(text)
+    document.plan(wpm)  # Plan outside the timed loop
+
+    autotyper.session.reset_position()
+    autotyper.session.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        autotyper.human_type_enhanced(document.text, wpm, backend=backend,
+                                      scheduler=scheduler)
+        autotyper.get_progress_reporter().flush()  # Output is written on another thread
+    wall = time.perf_counter() - start
+
+    if autotyper.session.position != 0:
+        raise AssertionError("virtual session did not complete")
+    if backend.keystrokes < document.char_count:
+        raise AssertionError(
+            f"only {backend.keystrokes}/{document.char_count} keystrokes emitted")
+
+    achieved_wpm = ((document.char_count / 5) / (clock.now / 60)
+                    if clock.now > 0 else 0.0)
+    return {
+        'chars': document.char_count,
+        'target_wpm': wpm,
+        'backend_latency_s': latency,
+        'batch_threshold_s': batch_threshold,
+        'achieved_wpm': achieved_wpm,
+        'wpm_deviation_pct': (achieved_wpm - wpm) / wpm * 100,
+        'virtual_duration_s': clock.now,
+        'overhead_per_key_us': wall / document.char_count * 1e6,
+        'mean_lateness_ms': scheduler.mean_lateness * 1000,
+        'interval_p99_ms':
+            autotyper.session.telemetry.percentile('interval', 99) * 1000,
+    }
+
+def bench_session(chars=20_000, wpms=(50, 85, 120, 150), latencies=(0.0, 0.002)):
+    """Scheduler overhead per keystroke and achieved vs target WPM"""
+    text = make_document(chars, seed=1)
+    results = []
+    for latency in latencies:
+        for wpm in wpms:
+            result = run_virtual_session(text, wpm, latency)
+            print(f"[BENCH] session {wpm:>3} WPM, latency {latency * 1000:.1f}ms | "
+                  f"achieved {result['achieved_wpm']:6.1f} WPM "
+                  f"({result['wpm_deviation_pct']:+6.1f}%) | "
+                  f"overhead {result['overhead_per_key_us']:6.2f}µs/key | "
+                  f"lateness {result['mean_lateness_ms']:.3f}ms")
+            results.append(result)
+    return results
+
+def bench_batch(chars=20_000, wpms=(300, 600, 900, 1200), latency=0.02,
+                thresholds=(None, 0.015)):
+    """Highest sustainable rate with a slow backend call, keys one by one vs batched"""
+    text = make_document(chars, seed=1)
+    results = []
+    for wpm in wpms:
+        for threshold in thresholds:
+            result = run_virtual_session(text, wpm, latency, threshold)
+            if threshold:
+                batching = f"batch <{threshold * 1000:.0f}ms"
+            else:
+                batching = "no batching"
+            print(f"[BENCH] batch {wpm:>4} WPM, latency {latency * 1000:.0f}ms, "
+                  f"{batching:<14} | achieved {result['achieved_wpm']:6.1f} WPM "
+                  f"({result['wpm_deviation_pct']:+6.1f}%)")
+            results.append(result)
+    return results
+
+def bench_plan(sizes=DOCUMENT_SIZES, wpm=85):
+    """Planning throughput in characters per second"""
+    autotyper.build_delay_plan(make_document(KB), wpm)  # Warm up one-time allocations
+    results = []
+    for size in sizes:
+        text = autotyper.clean_clipboard_text_advanced(make_document(size))
+        start = time.perf_counter()
+        plan = autotyper.start_delay_plan(text, wpm)
+        first_ready = time.perf_counter() - start  # When typing could start
+        plan.wait_ready(len(text) - 1)
+        elapsed = time.perf_counter() - start
+        if len(plan) != len(text):
+            raise AssertionError(
+                f"plan has {len(plan)} entries for {len(text)} characters")
+
+        # Saved plans must load back identical, and far faster than replanning
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.plan')
+            plan.save(path)
+            digest = autotyper.content_hash(text)  # Known from the Document in real use
+            start = time.perf_counter()
+            loaded = autotyper.load_delay_plan(path, text, digest)
+            load_elapsed = time.perf_counter() - start
+            if (list(loaded.delays[:1000]) != list(plan.delays[:1000])
+                    or loaded.seed != plan.seed):
+                raise AssertionError("saved plan did not load back identical")
+            del loaded
+
+        print(f"[BENCH] plan {size:>11,} chars | {elapsed * 1000:10.2f}ms | "
+              f"{len(text) / elapsed:14,.0f} chars/s | "
+              f"first key {first_ready * 1000:10.2f}ms | "
+              f"load {load_elapsed * 1000:8.2f}ms")
+        results.append({'size': size, 'seconds': elapsed,
+                        'chars_per_s': len(text) / elapsed,
+                        'first_ready_seconds': first_ready,
+                        'load_seconds': load_elapsed})
+    return results
+
+def bench_memory(sizes=DOCUMENT_SIZES, wpm=85):
+    """Peak memory to clean, index and plan documents of each size"""
+    autotyper.Document(make_document(KB)).plan(wpm)  # Warm up one-time allocations
+    results = []
+    for size in sizes:
+        raw = make_document(size)
+        tracemalloc.start()
+        document = autotyper.Document(raw)
+        plan = document.plan(wpm)
+        plan.wait_ready(len(plan) - 1)  # Count chunks planned in the background
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"[BENCH] memory {size:>11,} chars | peak {peak / MB:10.2f}MB | "
+              f"retained {current / MB:10.2f}MB | "
+              f"plan {plan.nbytes / len(plan):6.1f} bytes/key")
+        results.append({'size': size, 'peak_bytes': peak, 'retained_bytes': current,
+                        'plan_bytes_per_key': plan.nbytes / len(plan)})
+        del document, plan
+    return results
+
+# Each case runs in a fresh interpreter, so nothing is already imported
+STARTUP_CASES = {
+    'interpreter': 'pass',
+    'import': 'import autotyper',
+    'import_eager': ('import autotyper\n'
+                     'for module in (autotyper.np, autotyper.pyperclip,\n'
+                     '               autotyper.asyncio):\n'
+                     '    module and dir(module)'),
+    'cli_help': ('import sys, autotyper\n'
+                 'sys.argv[1:] = ["type", "--help"]\n'
+                 'autotyper.run_cli()'),
+}
+
+def bench_startup(repeat=10):
+    """Interpreter start plus import, with dependencies loaded lazily vs up front"""
+    directory = os.path.dirname(os.path.abspath(autotyper.__file__))
+    results = []
+    for case, code in STARTUP_CASES.items():
+        command = [sys.executable, '-c', code]
+        # Warm the bytecode cache
+        subprocess.run(command, cwd=directory, capture_output=True, check=True)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=directory, capture_output=True, check=True)
+            best = min(best, time.perf_counter() - start)
+        print(f"[BENCH] startup {case:<12} | {best * 1000:8.2f}ms")
+        results.append({'case': case, 'seconds': best})
+    return results
+
+def bench_timer(samples=200, delays=(0.005, 0.012, 0.03)):
+    """Real-clock wake-up overshoot and CPU cost of each precision timer mode"""
+    rng = random.Random(0)
+    waits = [rng.choice(delays) for _ in range(samples)]
+    results = []
+    for mode in autotyper.TIMER_MODES:
+        timer = autotyper.PrecisionTimer(time.sleep, mode=mode)
+        cpu = time.process_time()
+        for seconds in waits:
+            timer(seconds)
+        cpu = time.process_time() - cpu
+        timer.close()
+        stats = timer.overshoot.summary()
+        print(f"[BENCH] timer {mode:<9} ({timer.mode:<9}) | "
+              f"overshoot p50 {stats['p50'] * 1e6:7.0f}µs | "
+              f"p99 {stats['p99'] * 1e6:7.0f}µs | cpu {cpu / sum(waits) * 100:5.1f}%")
+        results.append({'case': mode, 'mode': timer.mode, 'margin_s': timer.margin,
+                        'overshoot_p50_s': stats['p50'],
+                        'overshoot_p99_s': stats['p99'],
+                        'overshoot_max_s': stats['max'],
+                        'cpu_fraction': cpu / sum(waits)})
+    return results
+
+SUITES = {
+    'batch': bench_batch,
+    'clean': bench_clean,
+    'memory': bench_memory,
+    'plan': bench_plan,
+    'session': bench_session,
+    'startup': bench_startup,
+    'timer': bench_timer,
+}
+
+# Suites that take the --max-size limit
+SIZED_SUITES = {'clean', 'memory', 'plan'}
+
+def revision():
+    """Short git revision of the working tree, or None outside a checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Row fields that identify a measurement rather than measure something
+IDENTITY_KEYS = {'case', 'size', 'chars', 'target_wpm', 'backend_latency_s',
+                 'batch_threshold_s'}
+
+def compare(previous, current):
+    """Print the ratio of every numeric result that exists in both runs"""
+    print(f"\n[INFO] 📊 {previous.get('revision')} → {current.get('revision')}")
+    for suite, rows in current['results'].items():
+        for old_row, new_row in zip(previous['results'].get(suite, []), rows):
+            label = ' '.join(f"{key}={new_row[key]}"
+                             for key in sorted(IDENTITY_KEYS) if key in new_row)
+            for key, value in new_row.items():
+                if key in IDENTITY_KEYS:
+                    continue
+                old_value = old_row.get(key)
+                numeric = (isinstance(value, (int, float))
+                           and isinstance(old_value, (int, float)))
+                if numeric and old_value:
+                    print(f"[COMPARE] {suite} {label} {key}: "
+                          f"{old_value:.4g} → {value:.4g} ({value / old_value:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AutoTyper benchmarks")
+    parser.add_argument('suites', nargs='*', choices=sorted(SUITES),
+                        help="suites to run (default: all)")
+    parser.add_argument('--max-size', type=int, default=100 * MB,
+                        help="largest document size in characters (default: 100MB)")
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="JSON results file")
+    parser.add_argument('--compare', metavar='JSON',
+                        help="previous results to compare against")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="session seed, so runs replay the same plans")
+    args = parser.parse_args(argv)
+    autotyper.SESSION_SEED = args.seed
+
+    results = {}
+    for name in args.suites or sorted(SUITES):
+        print(f"\n[INFO] 🏁 Suite: {name}")
+        if name == 'clean':
+            sizes = [size for size in (10_000, MB, 10 * MB) if size <= args.max_size]
+            results[name] = SUITES[name](sizes=sizes)
+        elif name in SIZED_SUITES:
+            sizes = [size for size in DOCUMENT_SIZES if size <= args.max_size]
+            results[name] = SUITES[name](sizes=sizes)
+        else:
+            results[name] = SUITES[name]()
+
+    report = {
+        'revision': revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': autotyper.np.__version__ if autotyper.HAS_NUMPY else None,
+        'seed': args.seed,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[INFO] 💾 Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
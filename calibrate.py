@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+AutoTyper calibration - run with: python3 calibrate.py keystrokes.csv
+
+Fits the timing model to a recorded keystroke log and writes it as JSON
+(timing_model.json by default), which autotyper.py loads at startup in
+place of its hand-tuned constants.
+
+The log is a CSV with a key column and a timestamp column, with or without
+a "key,timestamp" header. Keys are single characters or the names space,
+enter, return and tab. Backspace, delete and any other named key mark a
+correction, so the intervals around them are left out of the fit.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import chain
+
+import autotyper
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+KEY_NAMES = {'space': ' ', 'enter': '\n', 'return': '\n', 'tab': '\t'}
+TIME_UNITS = {'s': 1.0, 'ms': 1e-3, 'us': 1e-6, 'ns': 1e-9}
+
+MIN_RANGE_FACTOR = 0.05  # Lowest modifier a fitted range may start at
+BIGRAM_STEP = 0.05       # Fitted bigrams are grouped into classes of this width
+BIGRAM_THRESHOLD = 0.1   # Bigrams within 10% of a plain keystroke keep the defaults
+MAX_BIGRAM_CLASSES = 256 - len(autotyper.BIGRAM_CLASS_NAMES)
+VARIATION_WINDOW = 5     # Plain keystrokes either side of each one in its local median
+VARIATION_GRID = 40      # Candidate variations simulated between 0.02 and 0.8
+
+def read_keystroke_log(path, unit='s'):
+    """Typed text, timestamps in seconds, and which intervals a correction interrupts"""
+    scale = TIME_UNITS[unit]
+    chars = []
+    stamps = []
+    broken = []  # broken[i]: the interval after chars[i] contains a correction
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return '', np.zeros(0), np.zeros(0, dtype=bool)
+
+        header = [cell.strip().lower() for cell in first]
+        if 'key' in header and 'timestamp' in header:
+            key_column, time_column = header.index('key'), header.index('timestamp')
+            rows = reader
+        else:
+            key_column, time_column = 0, 1
+            rows = chain([first], reader)
+
+        for row in rows:
+            key = row[key_column]
+            if len(key) != 1:
+                key = KEY_NAMES.get(key.strip().lower())
+            if key is None:
+                if broken:
+                    broken[-1] = True
+                continue
+            chars.append(key)
+            stamps.append(row[time_column])
+            broken.append(False)
+
+    stamps = np.array(stamps, dtype=np.float64) * scale
+    return ''.join(chars), stamps, np.array(broken, dtype=bool)
+
+def _log_quartiles(ratios):
+    return np.percentile(np.log(ratios), [25, 50, 75])
+
+def _modifier_range(center, log_iqr, baseline_log_iqr):
+    """Uniform range around center, as wide as the baseline noise leaves unexplained"""
+    # Independent multiplicative noise adds in log space, and a uniform draw's
+    # interquartile range is half its width
+    excess = np.sqrt(max(log_iqr ** 2 - baseline_log_iqr ** 2, 0.0))
+    half_width = center * excess
+    return [round(max(MIN_RANGE_FACTOR, center - half_width), 4),
+            round(center + half_width, 4)]
+
+def _spread_range(ratios, baseline_log_iqr):
+    """Modifier range for a class from its ratios to the plain base delay"""
+    low, median, high = _log_quartiles(ratios)
+    return _modifier_range(float(np.exp(median)), high - low, baseline_log_iqr)
+
+def _grouped_quartiles(groups, values):
+    """Per-group count and 25th/50th/75th percentiles of values, by integer group id"""
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    ids, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    quartiles = [values[starts + ((counts - 1) * q).astype(np.int64)]
+                 for q in (0.25, 0.5, 0.75)]
+    return ids, counts, quartiles
+
+def _local_spread(gaps, window=VARIATION_WINDOW):
+    """Robust spread of each interval relative to the median of its neighbours"""
+    from numpy.lib.stride_tricks import sliding_window_view
+    padded = np.pad(gaps, window, mode='edge')
+    ratios = gaps / np.median(sliding_window_view(padded, 2 * window + 1), axis=1)
+    return 1.4826 * np.median(np.abs(ratios - np.median(ratios)))
+
+def _fit_variation(plain_gaps, base_wpm, samples=20_000, seed=0):
+    """WPM_VARIATION whose planned plain keystrokes show the log's local spread"""
+    # The local median takes out flow states, but bursts, hesitations and micro-pauses
+    # still widen the spread. The planner applies those again, so simulate it over a
+    # grid of variations and read off the one that matches the log. The spread is a
+    # statistic, so a fixed sample keeps long logs from slowing every grid point.
+    text = 'a' * samples
+    grid = np.linspace(0.02, 0.8, VARIATION_GRID)
+    spreads = []
+    saved = autotyper.WPM_VARIATION
+    try:
+        for variation in grid:
+            autotyper.WPM_VARIATION = float(variation)
+            rng = np.random.default_rng(seed)
+            delays, _ = autotyper._plan_delays_numpy(text, base_wpm, rng)
+            spreads.append(_local_spread(delays.astype(np.float64)))
+    finally:
+        autotyper.WPM_VARIATION = saved
+    spreads = np.maximum.accumulate(spreads)
+    return float(np.interp(_local_spread(plain_gaps), spreads, grid))
+
+def fit_timing_model(text, stamps, broken, max_gap=2.0, min_samples=50):
+    """Fit modifier ranges, variation and fatigue from a keystroke log"""
+    gaps = np.diff(stamps)
+    char_classes, bigram_classes = autotyper.classify_text(text[:-1])
+    valid = ~broken[:-1] & (gaps > 0) & (gaps <= max_gap)
+
+    # Plain keystrokes outside any bigram class set the base delay
+    no_bigram = bigram_classes == autotyper.BIGRAM_NONE
+    plain = valid & (char_classes == autotyper.CHAR_PLAIN) & no_bigram
+    if plain.sum() < min_samples:
+        raise ValueError(f"Need at least {min_samples} plain keystrokes, "
+                         f"found {int(plain.sum())}")
+    base_delay = float(np.median(gaps[plain]))
+    ratios = gaps / base_delay
+
+    plain_ratios = ratios[plain]
+    wpm_variation = _fit_variation(gaps[plain], 12.0 / base_delay)
+    wpm_variation = float(np.clip(wpm_variation, 0.05, 0.6))
+    low, _, high = _log_quartiles(plain_ratios)
+    baseline = high - low  # Spread every class shares: base variation, flow and bursts
+
+    # Fatigue: linear slowdown of plain keystrokes across the log
+    progress = np.flatnonzero(plain) / len(gaps)
+    slope, intercept = np.polyfit(progress, gaps[plain], 1)
+    fatigue_factor = (float(np.clip(slope / intercept, 0.0, 1.0))
+                      if intercept > 0 else 0.0)
+
+    char_class_ranges = {}
+    for code, name in enumerate(autotyper.CHAR_CLASS_NAMES):
+        if code in (autotyper.CHAR_PLAIN, autotyper.CHAR_CARRIAGE_RETURN):
+            continue  # Plain is the reference; carriage returns are never typed
+        selected = valid & (char_classes == code) & no_bigram
+        if selected.sum() >= min_samples:
+            char_class_ranges[name] = _spread_range(ratios[selected], baseline)
+
+    bigram_class_ranges = {}
+    plain_chars = valid & (char_classes == autotyper.CHAR_PLAIN)
+    for code in (autotyper.BIGRAM_COMMON, autotyper.BIGRAM_DIFFICULT):
+        selected = plain_chars & (bigram_classes == code)
+        if selected.sum() >= min_samples:
+            name = autotyper.BIGRAM_CLASS_NAMES[code]
+            bigram_class_ranges[name] = _spread_range(ratios[selected], baseline)
+
+    # Individual bigrams, grouped into classes by their median modifier
+    codes = np.frombuffer(text.encode('utf-32-le', 'surrogatepass'),
+                          dtype=np.uint32).astype(np.int64)
+    codes[(codes >= ord('A')) & (codes <= ord('Z'))] += 32
+    pairs = codes[:-2] << 21 | codes[1:-1]  # pairs[i - 1] is the bigram ending at i
+    selected = np.flatnonzero(plain_chars[1:]) + 1
+    ids, counts, (q1, median, q3) = _grouped_quartiles(pairs[selected - 1],
+                                                       np.log(ratios[selected]))
+
+    median = np.exp(median)
+    frequent = (counts >= min_samples) & (np.abs(median - 1.0) > BIGRAM_THRESHOLD)
+    steps = np.round(median[frequent] / BIGRAM_STEP).astype(np.int64)
+    log_iqrs = (q3 - q1)[frequent]
+    groups = {}
+    for pair, step, log_iqr in zip(ids[frequent].tolist(), steps.tolist(),
+                                   log_iqrs.tolist()):
+        groups.setdefault(step, ([], []))
+        groups[step][0].append(chr(pair >> 21) + chr(pair & 0x1FFFFF))
+        groups[step][1].append(log_iqr)
+
+    # Keep the most populated classes if there are more steps than class codes
+    ranked = sorted(groups.items(), key=lambda item: -len(item[1][0]))
+    ranked = ranked[:MAX_BIGRAM_CLASSES]
+    bigram_groups = []
+    for step, (bigrams, log_iqrs) in sorted(ranked):
+        bigram_groups.append({
+            'range': _modifier_range(step * BIGRAM_STEP, float(np.mean(log_iqrs)),
+                                     baseline),
+            'bigrams': sorted(bigrams),
+        })
+
+    return {
+        'version': 1,
+        'samples': int(valid.sum()),
+        'measured_wpm': round(12.0 / base_delay, 1),
+        'wpm_variation': round(wpm_variation, 4),
+        'fatigue_factor': round(fatigue_factor, 4),
+        'char_class_ranges': char_class_ranges,
+        'bigram_class_ranges': bigram_class_ranges,
+        'bigram_classes': bigram_groups,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fit the AutoTyper timing model to a keystroke log")
+    parser.add_argument('log', help="CSV of key and timestamp per keystroke")
+    parser.add_argument('--unit', choices=sorted(TIME_UNITS), default='s',
+                        help="timestamp unit (default: s)")
+    parser.add_argument('--output', default=autotyper.TIMING_MODEL_PATH,
+                        help="model file to write")
+    parser.add_argument('--max-gap', type=float, default=2.0,
+                        help="longest interval in seconds counted as typing, "
+                             "not a break (default: 2.0)")
+    parser.add_argument('--min-samples', type=int, default=50,
+                        help="fewest samples a class or bigram needs to be fitted "
+                             "(default: 50)")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("[ERROR] ❌ Calibration needs NumPy: pip3 install numpy")
+        return 1
+
+    start = time.perf_counter()
+    text, stamps, broken = read_keystroke_log(args.log, args.unit)
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] 📋 Read {len(text):,} keystrokes in {elapsed:.2f}s")
+
+    start = time.perf_counter()
+    try:
+        model = fit_timing_model(text, stamps, broken, args.max_gap, args.min_samples)
+    except ValueError as e:
+        print(f"[ERROR] ❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] 📐 Fitted {model['samples']:,} intervals in {elapsed:.2f}s")
+    print(f"[STATS] ⚡ Measured {model['measured_wpm']} WPM | "
+          f"variation {model['wpm_variation']:.2f} | "
+          f"fatigue {model['fatigue_factor']:.2f}")
+    for name, (low, high) in model['char_class_ranges'].items():
+        print(f"[STATS] 🔤 {name}: {low:.2f}-{high:.2f}x")
+    bigrams = sum(len(group['bigrams']) for group in model['bigram_classes'])
+    print(f"[STATS] 🔗 {bigrams} bigrams in {len(model['bigram_classes'])} classes")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(model, f, indent=1, ensure_ascii=False)
+    print(f"[INFO] 💾 Timing model saved to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
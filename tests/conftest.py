@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the top-level modules straight from the checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import autotyper
+
+@pytest.fixture
+def engine():
+    """A running TypingEngine on the null backend, shut down after the test"""
+    engine = autotyper.TypingEngine(autotyper.create_output_backend('null'))
+    engine.start()
+    yield engine
+    engine.shutdown()
@@ -0,0 +1,53 @@
+"""Key batching: timed batches type the same keys at the same times as single keys"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import autotyper
+from benchmark import VirtualClock, make_document
+
+def _record(text, batch_threshold, monkeypatch):
+    """Keystroke events of one virtual run, and the sizes of its write_timed batches"""
+    monkeypatch.setattr(autotyper, 'KEY_BATCH_THRESHOLD', batch_threshold)
+    clock = VirtualClock()
+    backend = autotyper.RecordingBackend(clock)
+    batches = []
+    write_timed = backend.write_timed
+
+    def record_batch(text, gaps):
+        batches.append(len(text))
+        write_timed(text, gaps)
+
+    backend.write_timed = record_batch
+    controller = autotyper.SessionController()
+    controller.start()
+    reporter = autotyper.ProgressReporter(json_path='')
+    scheduler = autotyper.DeadlineScheduler(clock=clock, sleep=clock.sleep)
+    completed = autotyper.human_type_enhanced(
+        text, 85, backend, scheduler, controller, reporter=reporter)
+    reporter.flush()  # Its output is written on another thread
+    assert completed
+    return backend, batches
+
+# Plans are cached per document, so each typo rate gets a text of its own
+@pytest.mark.parametrize('typo_rate, seed', [(0.0, 31), (0.05, 32)])
+def test_batched_run_matches_single_keys(monkeypatch, typo_rate, seed):
+    # The speed controller updates once per batch, so compare the raw plan
+    monkeypatch.setattr(autotyper, 'WPM_CONTROL', False)
+    monkeypatch.setattr(autotyper, 'TYPO_RATE', typo_rate)
+    text = autotyper.document_cache.get(make_document(3_000, seed=seed)).text
+
+    single, single_batches = _record(text, None, monkeypatch)
+    batched, batches = _record(text, 0.2, monkeypatch)
+
+    assert not single_batches
+    assert batches and max(batches) > 1
+    assert batched.text == single.text == text
+    typos = sum(event[2] == 'backspace' for event in single.events)
+    assert bool(typos) == bool(typo_rate)
+    assert [event[1:] for event in batched.events] == [
+        event[1:] for event in single.events]
+    # Cumulative time of every keystroke, not just the total, stays on the plan
+    assert [event[0] for event in batched.events] == pytest.approx(
+        [event[0] for event in single.events], abs=1e-6)
@@ -0,0 +1,41 @@
+"""Calibration round trip: a log typed by the planner fits back to its settings"""
+
+import csv
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import autotyper
+import calibrate
+
+WORDS = ('the quick brown fox jumps over lazy dog and then some more words '
+         'appear in this sample text').split()
+
+def _write_planned_log(path, text, wpm, seed):
+    """Keystroke CSV timed exactly as the planner would type text"""
+    plan = autotyper.build_delay_plan(text, wpm, seed)
+    delays = np.asarray(plan.delays, dtype=np.float64)
+    stamps = np.concatenate(([0.0], np.cumsum(delays[:-1])))
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(('key', 'timestamp'))
+        for char, stamp in zip(text, stamps.tolist()):
+            writer.writerow(('space' if char == ' ' else char, f"{stamp:.6f}"))
+
+def test_fit_recovers_planner_settings(tmp_path):
+    rng = random.Random(0)
+    text = ' '.join(rng.choice(WORDS) for _ in range(30000))
+    path = tmp_path / 'keys.csv'
+    _write_planned_log(path, text, 85, seed=7)
+
+    model = calibrate.fit_timing_model(*calibrate.read_keystroke_log(path))
+
+    assert model['wpm_variation'] == pytest.approx(autotyper.WPM_VARIATION, abs=0.05)
+    assert model['fatigue_factor'] == pytest.approx(autotyper.FATIGUE_FACTOR, abs=0.04)
+    # Range widths are noisy at this log size; the middle of a class range is not
+    low, high = model['char_class_ranges']['space']
+    expected_low, expected_high = autotyper.CHAR_CLASS_RANGES[autotyper.CHAR_SPACE]
+    expected_center = (expected_low + expected_high) / 2
+    assert (low + high) / 2 == pytest.approx(expected_center, abs=0.08)
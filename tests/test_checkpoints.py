@@ -0,0 +1,47 @@
+"""Checkpoint journal: positions replay after restarts, compaction and torn writes"""
+
+import autotyper
+
+def _journal(path, **options):
+    return autotyper.CheckpointJournal(str(path), **options)
+
+def test_noted_positions_replay(tmp_path):
+    path = tmp_path / 'checkpoints.jsonl'
+    journal = _journal(path, every_keys=10, interval=60.0)
+    for position in range(1, 96):
+        journal.note('a', position, now=0.0)
+    journal.close()  # Writes the last noted position too
+    assert _journal(path).position('a') == 95
+
+def test_save_later_is_visible_at_once_and_written_by_the_writer(tmp_path):
+    path = tmp_path / 'checkpoints.jsonl'
+    journal = _journal(path)
+    journal.save_later('a', 42, sync=True)
+    assert journal.position('a') == 42
+    assert journal.wait_written()
+    assert _journal(path).position('a') == 42
+    journal.save_later('a', 0)
+    journal.close()
+    assert _journal(path).position('a') == 0
+
+def test_compaction_keeps_live_positions(tmp_path):
+    path = tmp_path / 'checkpoints.jsonl'
+    journal = _journal(path, compact_records=20)
+    for position in range(1, 200):
+        journal.save_later('a', position)
+        journal.save_later('b', position * 2)
+    journal.save_later('c', 7)
+    journal.save_later('c', 0)
+    journal.close()
+    assert len(path.read_text().splitlines()) < 40
+    replayed = _journal(path)
+    assert replayed.positions == {'a': 199, 'b': 398}
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / 'checkpoints.jsonl'
+    journal = _journal(path)
+    journal.save('a', 10)
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"digest": "a", "posit')
+    assert _journal(path).position('a') == 10
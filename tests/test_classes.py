@@ -0,0 +1,33 @@
+"""The dense class tables agree with the per-character classifiers"""
+
+import pytest
+
+import autotyper
+
+ASCII = [chr(code) for code in range(128)]
+
+@pytest.fixture
+def registered_bigram():
+    ranges = list(autotyper.BIGRAM_CLASS_RANGES)
+    overrides = dict(autotyper.BIGRAM_CLASS_OVERRIDES)
+    yield autotyper.register_bigram_class(['#a'], (0.5, 0.6))
+    autotyper.BIGRAM_CLASS_RANGES[:] = ranges
+    autotyper.BIGRAM_CLASS_OVERRIDES.clear()
+    autotyper.BIGRAM_CLASS_OVERRIDES.update(overrides)
+    autotyper.build_class_tables()
+
+def _check_tables():
+    for prev_char in ASCII + [None]:
+        for char in ASCII:
+            expected = (autotyper.classify_char(char, prev_char),
+                        autotyper.classify_bigram(prev_char, char))
+            actual = autotyper.lookup_classes(char, prev_char)
+            assert actual == expected, (prev_char, char)
+
+def test_tables_match_classifiers():
+    _check_tables()
+
+def test_registered_bigram_only_applies_to_its_pair(registered_bigram):
+    assert autotyper.lookup_classes('a', '#')[1] == registered_bigram
+    assert autotyper.lookup_classes('a', 'b')[1] == autotyper.classify_bigram('b', 'a')
+    _check_tables()
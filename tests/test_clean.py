@@ -0,0 +1,53 @@
+"""Cleaner equivalence: the compiled and streaming cleaners against the original"""
+
+import random
+
+import pytest
+
+import autotyper
+from benchmark import legacy_clean_clipboard_text_advanced
+
+# Hand-picked inputs covering each cleaning rule
+CLEAN_CASES = [
+    '',
+    '   ',
+    '\n\n\n',
+    'plain text',
+    'trailing spaces   \nand tabs\t\t\nend',
+    'multiple   spaces    inside',
+    '    four space indent\n        eight space indent',
+    '\ttab indent\n\t\tdouble tab   with  gaps  \n\t',
+    ' \tspace before tab\n\t space after tab',
+    'para one\n\n\n\n\npara two\n \n\t\n  \npara three',
+    '\r\nwindows\r\nline endings\r\n\r\n\r\n',
+    '\x0bvertical\x0ctab and form feed\x0b\nnext',
+    ' non-breaking   line separator \nx',
+    '  leading and trailing  \n\n',
+    'code:\n\tdef f():\n\t\treturn 1\n\n\n\tf()',
+]
+
+# Alphabet biased towards whitespace so random inputs hit every rule
+FUZZ_ALPHABET = [' ', ' ', ' ', '\n', '\n', '\t', '\r', '\x0b', '\x0c', '\xa0',
+                 '\x1c', '\x85', ' ', 'a', 'b', '.']
+
+def _random_chunks(text, rng):
+    """Split text at random points to exercise the streaming cleaner"""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 5)))
+    bounds = [0] + cuts + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+def _check(text, rng):
+    expected = legacy_clean_clipboard_text_advanced(text)
+    assert autotyper.clean_clipboard_text_advanced(text) == expected
+    streamed = ''.join(autotyper.iter_clean_clipboard_text(_random_chunks(text, rng)))
+    assert streamed == (expected or '')
+
+@pytest.mark.parametrize('text', CLEAN_CASES)
+def test_clean_cases(text):
+    _check(text, random.Random(0))
+
+def test_clean_fuzz():
+    rng = random.Random(0)
+    for _ in range(20000):
+        text = ''.join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 40)))
+        _check(text, rng)
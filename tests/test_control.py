@@ -0,0 +1,72 @@
+"""Control socket: bad requests get an error reply; only a socket is replaced"""
+
+import json
+import socket
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import autotyper
+
+@pytest.fixture
+def server(engine, tmp_path):
+    server = autotyper.ControlServer(engine, str(tmp_path / 'control.sock'))
+    engine.call(server.start(), timeout=10)
+    yield server
+    engine.call(server.close(), timeout=10)
+
+def _exchange(address, lines):
+    """Send raw request lines on one connection and return the decoded replies"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(10)
+        connection.connect(address)
+        with connection.makefile('rwb') as stream:
+            replies = []
+            for line in lines:
+                stream.write(line.encode() + b'\n')
+                stream.flush()
+                replies.append(json.loads(stream.readline()))
+    return replies
+
+@pytest.mark.parametrize('line', [
+    '[1]',
+    '"ping"',
+    'not json',
+    '{"command": "submit", "text": "hello", "wpm": "abc"}',
+    '{"command": "submit", "text": "hello", "wpm": -5}',
+    '{"command": "submit", "text": "hello", "priority": "high"}',
+    '{"command": "submit", "text": 5}',
+    '{"command": "submit"}',
+])
+def test_bad_request_gets_error_and_connection_stays_open(server, engine, line):
+    error, pong = _exchange(server.address, [line, '{"command": "ping"}'])
+    assert error['ok'] is False and error['error']
+    assert pong == {'ok': True, 'result': 'pong'}
+    assert not engine.jobs
+
+def test_refuses_to_replace_a_regular_file(engine, tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text('keep me')
+    with pytest.raises(FileExistsError):
+        engine.call(autotyper.ControlServer(engine, str(path)).start(), timeout=10)
+    assert path.read_text() == 'keep me'
+
+def test_submit_larger_than_the_default_stream_limit(server, engine):
+    text = 'word ' * 40_000  # 200KB, past asyncio's 64KB default line limit
+    request = json.dumps({'command': 'submit', 'text': text})
+    (reply,) = _exchange(server.address, [request])
+    assert reply['ok'] is True
+    assert len(engine.jobs) == 1
+
+def test_request_over_the_limit_gets_error(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(autotyper, 'CONTROL_MAX_REQUEST', 1024)
+    server = autotyper.ControlServer(engine, str(tmp_path / 'control.sock'))
+    engine.call(server.start(), timeout=10)
+    try:
+        request = json.dumps({'command': 'submit', 'text': 'word ' * 1000})
+        (reply,) = _exchange(server.address, [request])
+    finally:
+        engine.call(server.close(), timeout=10)
+    assert reply['ok'] is False and 'longer than' in reply['error']
+    assert not engine.jobs
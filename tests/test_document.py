@@ -0,0 +1,76 @@
+"""Documents: the LRU cache of cleaned texts and the position index"""
+
+import re
+
+import pytest
+
+import autotyper
+
+INDEX_TEXTS = ['', 'one', 'one two\nthree\n', '  lead\n\ntrail  ', 'tab\tsep\n\n']
+
+@pytest.fixture(params=[True, False], ids=['numpy', 'python'])
+def numpy_index(request, monkeypatch):
+    if request.param:
+        pytest.importorskip('numpy')
+    monkeypatch.setattr(autotyper, 'HAS_NUMPY', request.param)
+
+def test_cache_evicts_least_recently_used():
+    cache = autotyper.DocumentCache(max_entries=2)
+    first, second = cache.get('first text'), cache.get('second text')
+    assert cache.get('first text') is first  # Now the most recently used
+    cache.get('third text')
+    assert cache.get('first text') is first
+    assert cache.get('second text') is not second
+    assert (cache.hits, cache.misses) == (2, 4)
+
+def test_cache_evicts_beyond_byte_cap_but_keeps_latest():
+    large = 'word ' * 10_000
+    cache = autotyper.DocumentCache(max_bytes=1024)
+    first = cache.get('small text')
+    latest = cache.get(large)
+    assert latest.nbytes > cache.max_bytes
+    assert cache.get(large) is latest
+    assert cache.get('small text') is not first
+
+def test_cache_hit_on_the_cleaned_text():
+    cache = autotyper.DocumentCache()
+    document = cache.get('line one\r\nline two')
+    assert cache.get(document.text) is document
+    assert cache.hits == 1
+
+def test_raw_texts_that_clean_alike_are_evicted_separately():
+    cache = autotyper.DocumentCache(max_entries=2)
+    crlf = cache.get('line one\r\nline two')
+    spaced = cache.get('line one  \nline two')
+    assert crlf.text == spaced.text and crlf is not spaced
+    assert spaced.original_length != crlf.original_length
+    assert cache.get(crlf.text) is crlf  # The first one cached keeps the cleaned key
+
+    cache.get('other text')  # Evicts spaced, the least recently used
+    assert cache.get(crlf.text) is crlf
+    assert cache.get('line one\r\nline two') is crlf
+    assert cache.get('line one  \nline two') is not spaced
+
+@pytest.mark.parametrize('text', INDEX_TEXTS)
+def test_index_matches_a_scan_at_every_position(numpy_index, text):
+    index = autotyper.DocumentIndex(text)
+    word_ends = [match.end() for match in re.finditer(r'\S+', text)]
+    assert index.word_count == len(word_ends)
+    assert index.line_count == text.count('\n') + 1
+    for position in range(len(text) + 1):
+        typed = text[:position]
+        assert index.remaining_words(position) == sum(end > position
+                                                      for end in word_ends)
+        assert index.line_number(position) == typed.count('\n') + 1
+        expected_lines = text[position:].count('\n') + 1 if text[position:] else 0
+        assert index.remaining_lines(position) == expected_lines
+
+def test_index_at_the_start_and_end(numpy_index):
+    index = autotyper.DocumentIndex('one two\nthree\n')
+    assert (index.remaining_words(0), index.remaining_lines(0)) == (3, 3)
+    assert index.line_number(0) == 1
+    assert index.remaining_words(3) == 2  # 'one' is typed once its last char is
+    # After the trailing newline everything is typed; the cursor sits on line 3
+    assert (index.remaining_words(14), index.remaining_lines(14)) == (0, 0)
+    assert index.line_number(14) == 3
+    assert index.line_number(13) == 2  # The newline itself belongs to line 2
@@ -0,0 +1,21 @@
+"""Typing engine job bookkeeping"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import autotyper
+
+def test_failed_plan_leaves_no_job(engine):
+    with pytest.raises(TypeError):
+        engine.call(engine.submit('hello world', wpm='abc'), timeout=10)
+    assert not engine.jobs
+    assert engine.pending_job(autotyper.document_cache.get('hello world')) is None
+
+def test_lookup_finds_a_queued_job_on_the_loop(engine, monkeypatch):
+    monkeypatch.setattr(autotyper, 'CHECKPOINT_PATH', None)
+    monkeypatch.setattr(autotyper, '_checkpoint_journal', None)
+    document = autotyper.document_cache.get('lookup ' * 20)
+    assert engine.call(engine.lookup(document), timeout=10) == (None, (0, None, 0))
+    job = engine.call(engine.submit(document, countdown=60), timeout=10)
+    assert engine.call(engine.lookup(document), timeout=10)[0] is job
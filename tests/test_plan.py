@@ -0,0 +1,44 @@
+"""Plan files: a saved plan loads back identical, and only for its own text"""
+
+import pytest
+
+import autotyper
+
+TEXT = ("The quick brown fox jumps over the lazy dog.\n"
+        "\tSphinx of black quartz, judge my vow!")
+
+def _typos(plan):
+    typos = plan.typos
+    return list(typos.positions), list(typos.offsets), typos.keys, list(typos.delays)
+
+@pytest.fixture
+def plan(monkeypatch):
+    monkeypatch.setattr(autotyper, 'TYPO_RATE', 0.2)  # So the typo arrays are not empty
+    plan = autotyper.build_delay_plan(TEXT, 85, seed=7)
+    assert len(plan.typos)
+    return plan
+
+@pytest.mark.parametrize('numpy_load', [True, False])
+def test_saved_plan_loads_back_identical(tmp_path, monkeypatch, plan, numpy_load):
+    path = str(tmp_path / 'text.plan')
+    plan.save(path)
+    if not numpy_load:
+        monkeypatch.setattr(autotyper, 'HAS_NUMPY', False)
+    loaded = autotyper.load_delay_plan(path, TEXT)
+    assert list(loaded.delays) == list(plan.delays)
+    assert list(loaded.flow_codes) == list(plan.flow_codes)
+    assert _typos(loaded) == _typos(plan)
+    assert (loaded.base_wpm, loaded.seed, loaded.planner) == (85, 7, plan.planner)
+
+def test_plan_is_rejected_for_another_text(tmp_path, plan):
+    path = str(tmp_path / 'text.plan')
+    plan.save(path)
+    with pytest.raises(ValueError, match="different text"):
+        autotyper.load_delay_plan(path, TEXT.upper())
+
+def test_plan_is_rejected_after_typo_settings_change(tmp_path, monkeypatch, plan):
+    path = str(tmp_path / 'text.plan')
+    plan.save(path)
+    monkeypatch.setattr(autotyper, 'TYPO_RATE', 0.1)
+    with pytest.raises(ValueError, match="typo settings"):
+        autotyper.load_delay_plan(path, TEXT)
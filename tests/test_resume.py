@@ -0,0 +1,63 @@
+"""Edit-aware resume: where an edited copy of a stopped text picks up again"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import autotyper
+
+TEXT = ("The quick brown fox jumps over the lazy dog. "
+        "Sphinx of black quartz, judge my vow!")
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(autotyper, 'CHECKPOINT_PATH', None)
+    monkeypatch.setattr(autotyper, '_checkpoint_journal', None)
+    monkeypatch.setattr(autotyper, 'RESUME_ERASE_DIVERGED', True)
+    return autotyper.TypingEngine(autotyper.create_output_backend('null'))
+
+def _stopped_at(engine, text, typed):
+    """Make engine's last run a cancelled job that typed the first chars of text"""
+    engine.last_run = SimpleNamespace(
+        document=autotyper.document_cache.get(text),
+        finished=autotyper.JOB_CANCELLED,
+        session=SimpleNamespace(position=typed))
+    return engine.last_run
+
+@pytest.mark.parametrize('a, b, limit, expected', [
+    ('', '', None, 0),
+    ('abc', '', None, 0),
+    ('abc', 'abc', None, 3),
+    ('abcdef', 'abcxyz', None, 3),
+    ('abcdef', 'abcdef', 4, 4),
+    ('abcdef', 'abXdef', 4, 2),
+    ('x' * 1000 + 'a', 'x' * 1000 + 'b', None, 1000),
+])
+def test_common_prefix_length(a, b, limit, expected):
+    assert autotyper.common_prefix_length(a, b, limit) == expected
+
+def test_edit_after_the_typed_text_continues_where_it_stopped(engine):
+    last = _stopped_at(engine, TEXT, 40)
+    edited = TEXT.replace('vow', 'oath')
+    assert engine.resume_point(autotyper.document_cache.get(edited)) == (40, last, 0)
+
+def test_mid_text_edit_erases_back_to_the_change(engine):
+    last = _stopped_at(engine, TEXT, 60)
+    edited = TEXT.replace('lazy', 'sleepy')
+    change = TEXT.index('lazy')
+    assert change >= autotyper.RESUME_MIN_MATCH
+    point = engine.resume_point(autotyper.document_cache.get(edited))
+    assert point == (change, last, 60 - change)
+
+def test_edit_in_a_short_prefix_erases_everything_typed(engine):
+    last = _stopped_at(engine, TEXT, 23)
+    edited = TEXT[:10] + 'red' + TEXT[15:]
+    point = engine.resume_point(autotyper.document_cache.get(edited))
+    assert point == (0, last, 23)
+
+def test_edit_in_a_short_prefix_is_left_to_the_user_without_erasing(engine,
+                                                                    monkeypatch):
+    monkeypatch.setattr(autotyper, 'RESUME_ERASE_DIVERGED', False)
+    last = _stopped_at(engine, TEXT, 60)
+    edited = 'A' + TEXT[1:]
+    assert engine.resume_point(autotyper.document_cache.get(edited)) == (0, last, 0)
@@ -0,0 +1,53 @@
+"""Session control: pause, resume and stop wake a blocked typing worker at once"""
+
+import threading
+import time
+
+import pytest
+
+import autotyper
+
+WAKE_TIMEOUT = 1.0
+
+def _blocked(wait):
+    """Run wait on a thread; return the thread and a list that receives its result"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(wait()), daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    assert thread.is_alive() and not result  # Still blocked
+    return thread, result
+
+@pytest.fixture
+def paused():
+    controller = autotyper.SessionController()
+    assert controller.start() and controller.pause()
+    return controller
+
+@pytest.mark.parametrize('wake, expected', [('stop', False), ('resume', True)])
+def test_wait_while_paused_wakes_promptly(paused, wake, expected):
+    thread, result = _blocked(paused.wait_while_paused)
+    start = time.monotonic()
+    getattr(paused, wake)()
+    thread.join(WAKE_TIMEOUT)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < WAKE_TIMEOUT
+    assert result == [expected]
+
+@pytest.mark.parametrize('wake', ['pause', 'stop'])
+def test_sleep_wakes_promptly(wake):
+    controller = autotyper.SessionController()
+    controller.start()
+    thread, result = _blocked(lambda: controller.sleep(60))
+    start = time.monotonic()
+    getattr(controller, wake)()
+    thread.join(WAKE_TIMEOUT)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < WAKE_TIMEOUT
+    assert result == [False]
+
+def test_stopped_controller_ignores_pause_and_resume():
+    controller = autotyper.SessionController()
+    assert not controller.pause() and not controller.resume()
+    assert controller.state == autotyper.TYPING_STOPPED
+    assert controller.wait_while_paused() is False
@@ -0,0 +1,41 @@
+"""Typo plans: every text plans without error and replays to exactly the text"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import autotyper
+from benchmark import VirtualClock
+
+@pytest.mark.parametrize('text', ['a', 'ab', 'aa', 'a.', '.\n'])
+def test_short_texts_plan_at_full_rate(text):
+    delays = [0.1] * len(text)
+    for seed in range(300):
+        typos = autotyper.plan_typos(text, delays, seed, rate=1.0)
+        assert all(0 <= position < len(text) for position in typos.positions)
+
+def test_plan_ending_in_a_typo():
+    plan = autotyper.build_delay_plan('Hello world.', 85, 333)
+    assert len(plan) == len('Hello world.')
+
+@pytest.mark.parametrize('seed', range(5))
+def test_typos_replay_to_the_text(monkeypatch, seed):
+    monkeypatch.setattr(autotyper, 'TYPO_RATE', 0.2)
+    monkeypatch.setattr(autotyper, 'SESSION_SEED', seed)
+    text = ('The quick brown fox, jumps over the lazy dog.\n'
+            '\tIndented line; "quoted" end.')
+    clock = VirtualClock()
+    backend = autotyper.RecordingBackend(clock)
+    controller = autotyper.SessionController()
+    controller.start()
+    reporter = autotyper.ProgressReporter(json_path='')
+    document = autotyper.document_cache.get(text)
+    assert len(document.plan(85).typos) > 0
+
+    scheduler = autotyper.DeadlineScheduler(clock=clock, sleep=clock.sleep)
+    completed = autotyper.human_type_enhanced(
+        document.text, 85, backend, scheduler, controller, reporter=reporter)
+    reporter.flush()  # Its output is written on another thread
+
+    assert completed
+    assert backend.text == document.text
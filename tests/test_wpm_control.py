@@ -0,0 +1,34 @@
+"""Speed control: typing converges on the target WPM, and the ETA predicts it"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import autotyper
+import benchmark
+
+@pytest.fixture(autouse=True)
+def unbatched(monkeypatch):
+    # run_virtual_session sets the threshold globally; monkeypatch restores it
+    monkeypatch.setattr(autotyper, 'KEY_BATCH_THRESHOLD', None)
+
+@pytest.mark.parametrize('wpm', [50, 85, 150])
+def test_typing_converges_on_target_and_eta_matches(monkeypatch, wpm):
+    monkeypatch.setattr(autotyper, 'WPM_CONTROL', True)
+    text = benchmark.make_document(10_000, seed=1)
+    document = autotyper.document_cache.get(text)
+    document.plan(wpm)
+    estimate = document.estimated_time(0, wpm)
+
+    result = benchmark.run_virtual_session(text, wpm)
+
+    # Fatigue slows the end of the text on purpose: on average by half its factor
+    expected_wpm = wpm / (1 + autotyper.FATIGUE_FACTOR / 2)
+    assert result['achieved_wpm'] == pytest.approx(expected_wpm, rel=0.03)
+    assert estimate == pytest.approx(result['virtual_duration_s'], rel=0.03)
+
+def test_eta_is_the_raw_plan_without_control(monkeypatch):
+    monkeypatch.setattr(autotyper, 'WPM_CONTROL', False)
+    document = autotyper.document_cache.get(benchmark.make_document(2_000, seed=2))
+    plan = document.plan(85)
+    assert document.estimated_time(100, 85) == pytest.approx(plan.remaining_time(100))